@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+
+# Name: benchmark_map_models_submodels.py
+# Purpose: Benchmark map_models_submodels.py against synthetic xlights_rgbeffects.xml files
+# Author: Bill Jenkins
+# Version: v1.0
+# Date: 06/16/2025
+
+###########################
+# Imports                 #
+###########################
+from xml.sax.saxutils import quoteattr
+import platform
+import sys
+import os
+import time
+import random
+import statistics
+import tempfile
+import shutil
+import logging
+import argparse
+import json
+import tracemalloc
+
+import map_models_submodels as mms
+
+###########################
+# Constants               #
+###########################
+# Bump RESULTS_VERSION whenever the layout of the results file changes
+RESULTS_VERSION = 1
+PROP_NAMES = ["Snowflake", "Mini Tree", "Arch", "Candy Cane", "Spinner", "Star", "Wreath", "Pole", "Bulb", "Mega Tree"]
+SUBMODEL_NAMES = ["Outer Ring", "Inner Ring", "Spoke", "Center", "Tip", "Base", "Left", "Right", "Top", "Bottom"]
+
+###############################
+# Family Name
+###############################
+def family_name(family: int):
+    # "<prop> <letters>": letters, not digits, so remove_trailing_chars keeps families apart
+    letters = ""
+    number = family + 1
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return(f"{PROP_NAMES[family % len(PROP_NAMES)]} {letters}")
+
+###############################
+# Generate RGB Effects
+###############################
+def generate_rgbeffects(rgbeffects_file: str, models: int, submodels: int = 40, family_size: int = 20,
+                        custom_model_size: int = 20000, effects: int = 500, seed: int = 1):
+    """
+    Writes a synthetic xlights_rgbeffects.xml file.
+
+    Args:
+        rgbeffects_file: The file to write.
+        models: Number of models.
+        submodels: Maximum number of subModels per model (each family uses the same subModels).
+        family_size: Number of models in each name family ("<prop> <family>-<n>").
+        custom_model_size: Length of the dummy CustomModel attribute of each model.
+        effects: Number of dummy effects written before the models section.
+        seed: Random seed, the same arguments and seed write the same file.
+    """
+
+    rng = random.Random(seed)
+    custom_model = ",".join(["1"] * (custom_model_size // 2))
+    with open(rgbeffects_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<xrgb>\n')
+        # Sections the mapping tool never reads
+        f.write('<effects version="0006">\n')
+        for i in range(effects):
+            f.write(f'  <effect name="Effect {i}" settings={quoteattr("E_SLIDER_Speed=" + "9" * 400)}/>\n')
+        f.write('</effects>\n<palettes>\n')
+        for i in range(effects // 10):
+            f.write(f'  <palette data="C_BUTTON_Palette1=#FF0000,C_CHECKBOX_Palette1={i}"/>\n')
+        f.write('</palettes>\n')
+        # Models
+        f.write('<models>\n')
+        family_submodels = []
+        for i in range(models):
+            family = i // family_size
+            if (i % family_size == 0):
+                family_submodels = [f"{SUBMODEL_NAMES[j % len(SUBMODEL_NAMES)]} {j // len(SUBMODEL_NAMES) + 1}"
+                                    for j in range(rng.randint(0, submodels))]
+            model_name = f"{family_name(family)}-{i % family_size + 1}"
+            f.write(f'  <model name={quoteattr(model_name)} Description={quoteattr("Synthetic " + model_name)}'
+                    f' DisplayAs="Custom" StringType="RGB Nodes" CustomModel="{custom_model}">\n')
+            for j, submodel_name in enumerate(family_submodels):
+                f.write(f'    <subModel name={quoteattr(submodel_name)} layout="horizontal" type="ranges"'
+                        f' line0="{j * 10 + 1}-{j * 10 + 10}"/>\n')
+            f.write('    <ControllerConnection Port="1" Protocol="ws2811"/>\n  </model>\n')
+        f.write('</models>\n')
+        # Groups and Views
+        f.write('<modelGroups>\n')
+        for first_model in range(0, models, family_size):
+            family = first_model // family_size
+            members = ",".join(f"{family_name(family)}-{n + 1}" for n in range(min(family_size, models - first_model)))
+            f.write(f'  <modelGroup name={quoteattr(family_name(family) + " Group")} models={quoteattr(members)}/>\n')
+        # Nested Groups: a section of (up to) 10 family groups each, and one group of every section
+        families = (models + family_size - 1) // family_size
+        sections = []
+        for first_family in range(0, families, 10):
+            sections.append(f"Section {first_family // 10 + 1}")
+            members = ",".join(family_name(family) + " Group" for family in range(first_family, min(first_family + 10, families)))
+            f.write(f'  <modelGroup name={quoteattr(sections[-1])} models={quoteattr(members)}/>\n')
+        f.write(f'  <modelGroup name="All Sections" models={quoteattr(",".join(sections))}/>\n')
+        f.write('</modelGroups>\n<views>\n  <view name="Default" models=""/>\n</views>\n</xrgb>\n')
+
+###############################
+# Time Function
+###############################
+def time_function(function, repeat: int, setup=None):
+    # Run function repeat times, returning (list of seconds, peak traced memory of one run, last result)
+    times = []
+    result = None
+    for i in range(repeat):
+        if setup:
+            setup()
+        start_time = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start_time)
+    # One extra traced run for memory, kept out of the timings
+    if setup:
+        setup()
+    tracemalloc.start()
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return(times, peak_memory, result)
+
+###############################
+# Resident Memory
+###############################
+def resident_memory(function):
+    # Traced bytes still allocated by function's result, returned with the result
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    result = function()
+    resident_bytes = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+    return(resident_bytes, result)
+
+###############################
+# Dict Models Submodel(s)
+###############################
+def dict_models_submodels(rgbeffects_file: str):
+    # The pre-ModelRecord representation: a dict and a list of fresh strings per model
+    models_submodels = {}
+    submodels_list = None
+    depth = 0
+
+    def start_element(tag, attrs):
+        nonlocal depth, submodels_list
+        depth += 1
+        if (depth == 3 and tag == "model"):
+            submodels_list = []
+            models_submodels[attrs.get("name", "")] = {"description": attrs.get("Description", ""), "submodels": submodels_list}
+        elif (depth == 4 and tag == "subModel" and submodels_list is not None):
+            submodels_list.append(attrs.get("name"))
+
+    def end_element(tag):
+        nonlocal depth
+        depth -= 1
+
+    parser = mms.expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    with open(rgbeffects_file, 'rb') as f:
+        parser.ParseFile(f)
+    return(models_submodels)
+
+###############################
+# Benchmark Result
+###############################
+def benchmark_result(benchmark: str, models: int, times: list, peak_memory: int, items: int):
+    return({
+        "benchmark": benchmark,
+        "models": models,
+        "items": items,
+        "repeat": len(times),
+        "seconds_min": round(min(times), 6),
+        "seconds_median": round(statistics.median(times), 6),
+        "peak_memory_bytes": peak_memory,
+        })
+
+###############################
+# Run Benchmarks
+###############################
+def run_benchmarks(sizes: list, repeat: int, submodels: int, family_size: int, custom_model_size: int, work_dir: str):
+    results = []
+    for models in sizes:
+        show_folder = os.path.join(work_dir, f"show_{models}")
+        os.makedirs(show_folder, exist_ok=True)
+        rgbeffects_file = os.path.join(show_folder, "xlights_rgbeffects.xml")
+        generate_rgbeffects(rgbeffects_file, models, submodels, family_size, custom_model_size)
+        file_size = os.path.getsize(rgbeffects_file)
+        logging.info(f"{models} models: {rgbeffects_file} {file_size:,} bytes")
+
+        # Parse
+        times, peak_memory, models_submodels = time_function(lambda: mms.get_models_submodels(rgbeffects_file), repeat)
+        result = benchmark_result("get_models_submodels", models, times, peak_memory, len(models_submodels))
+        result["file_bytes"] = file_size
+        results.append(result)
+
+        # Offset Index: parse only the models and modelGroups sections through a memory map, and single models on demand
+        offsets = {}
+        mms.get_models_submodels(rgbeffects_file, offsets=offsets)
+        spans = sorted(offsets["sections"][tag] for tag in ("models", "modelGroups"))
+        times, peak_memory, section_models = time_function(lambda: mms.get_models_submodels(rgbeffects_file, spans=spans), repeat)
+        result = benchmark_result("models_sections_parse", models, times, peak_memory, len(section_models))
+        result["section_bytes"] = sum(end - start for start, end in spans)
+        results.append(result)
+        mms.offset_indexes[rgbeffects_file] = (mms.file_signature(rgbeffects_file), offsets)
+        detail_models = list(models_submodels)[::max(1, len(models_submodels) // 100)]
+
+        def parse_models():
+            return(sum(len(mms.parse_model(rgbeffects_file, model, False)["submodels"]) for model in detail_models))
+        times, peak_memory, detail_submodels = time_function(parse_models, repeat)
+        result = benchmark_result("parse_model", models, times, peak_memory, len(detail_models))
+        result["milliseconds_per_model"] = round(min(times) * 1000 / max(len(detail_models), 1), 3)
+        results.append(result)
+
+        # Model Store: resident memory of the compact ModelRecord store vs a dict of dicts per model
+        dict_bytes, dict_models = resident_memory(lambda: dict_models_submodels(rgbeffects_file))
+        del dict_models
+        compact_bytes, compact_models = resident_memory(lambda: mms.get_models_submodels(rgbeffects_file))
+        del compact_models
+        results.append({"benchmark": "model_store_memory", "models": models, "items": models,
+                        "dict_resident_bytes": dict_bytes, "compact_resident_bytes": compact_bytes,
+                        "reduction_factor": round(dict_bytes / max(compact_bytes, 1), 2)})
+
+        # Model Groups: build the group index and expand every (nested) group once
+        model_groups = {}
+        mms.load_models_submodels(rgbeffects_file, False, model_groups=model_groups)
+
+        def expand_groups():
+            group_index = mms.ModelGroupIndex(model_groups, models_submodels)
+            return(sum(len(group_index.expand(group)) for group in group_index.groups()))
+        times, peak_memory, members = time_function(expand_groups, repeat)
+        result = benchmark_result("group_expansion", models, times, peak_memory, members)
+        result["groups"] = len(model_groups)
+        results.append(result)
+
+        # Change Detection: compare the models with a copy in which one model's subModels changed
+        changed_models_submodels = dict(models_submodels)
+        changed_models_submodels[next(iter(models_submodels))] = mms.ModelRecord("", ("Changed",), "changed")
+        times, peak_memory, changed_models = time_function(lambda: mms.get_changed_models(models_submodels, changed_models_submodels), repeat)
+        results.append(benchmark_result("change_detection", models, times, peak_memory, len(changed_models)))
+
+        # Family Matching: build the index and look up the family of every model
+        def match_families():
+            family_index = mms.build_family_index(models_submodels)
+            return(sum(len(mms.get_family_mapping_models(family_index, model)) for model in models_submodels))
+        times, peak_memory, matches = time_function(match_families, repeat)
+        results.append(benchmark_result("family_matching", models, times, peak_memory, matches))
+
+        # Name Search Index: build time, then the suggestions for the first model of (up to 1000) families
+        times, peak_memory, name_index = time_function(lambda: mms.NameSearchIndex(models_submodels), repeat)
+        results.append(benchmark_result("name_index_build", models, times, peak_memory, len(models_submodels)))
+        primary_models = [members[0] for members in mms.build_family_index(models_submodels).values()][:1000]
+
+        def suggest_models():
+            return(sum(len(mms.get_suggested_mapping_models(name_index, models_submodels, model)) for model in primary_models))
+        times, peak_memory, suggestions = time_function(suggest_models, repeat)
+        result = benchmark_result("name_suggestions", models, times, peak_memory, suggestions)
+        result["queries"] = len(primary_models)
+        result["milliseconds_per_query"] = round(min(times) * 1000 / max(len(primary_models), 1), 3)
+        results.append(result)
+
+        # Mapping Files: one file per name family
+        mapping_folder = os.path.join(show_folder, "mapping")
+        family_index = mms.build_family_index(models_submodels)
+        jobs = []
+        for members in family_index.values():
+            primary_model = members[0]
+            jobs.append((os.path.join(mapping_folder, primary_model + ".xmap"), primary_model,
+                         models_submodels[primary_model]["submodels"], members[1:]))
+
+        def reset_mapping_folder():
+            shutil.rmtree(mapping_folder, ignore_errors=True)
+            os.makedirs(mapping_folder)
+
+        def create_mapping_files():
+            for job in jobs:
+                mms.create_mapping_file(*job)
+            return(len(jobs))
+        times, peak_memory, files = time_function(create_mapping_files, repeat, reset_mapping_folder)
+        results.append(benchmark_result("create_mapping_file", models, times, peak_memory, files))
+
+        def generate_mapping_files():
+            return(len(mms.generate_mapping_files(jobs)))
+        times, peak_memory, files = time_function(generate_mapping_files, repeat, reset_mapping_folder)
+        results.append(benchmark_result("generate_mapping_files", models, times, peak_memory, files))
+
+        # Merge Mapping Files: add one target to every existing mapping file
+        def create_all_mapping_files():
+            reset_mapping_folder()
+            create_mapping_files()
+
+        def merge_mapping_files():
+            for mapping_file_name, primary_model, submodels_list, mapping_models in jobs:
+                mms.create_mapping_file(mapping_file_name, primary_model, submodels_list, mapping_models + ["Merged Target"], True)
+            return(len(jobs))
+        times, peak_memory, files = time_function(merge_mapping_files, repeat, create_all_mapping_files)
+        results.append(benchmark_result("merge_mapping_files", models, times, peak_memory, files))
+        shutil.rmtree(show_folder, ignore_errors=True)
+    return(results)
+
+###############################
+# Compare Results
+###############################
+def compare_results(baseline: dict, results: dict, threshold: float):
+    # List of regressions where seconds_min grew by more than threshold (e.g. 1.25 = 25% slower)
+    baseline_results = {(result["benchmark"], result["models"]): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results["results"]:
+        baseline_result = baseline_results.get((result["benchmark"], result["models"]))
+        if ("seconds_min" not in result or baseline_result is None or baseline_result.get("seconds_min", 0) <= 0):
+            continue
+        ratio = result["seconds_min"] / baseline_result["seconds_min"]
+        print(f"{result['benchmark']:<24} {result['models']:>8} models  {baseline_result['seconds_min']:>10.6f}s -> {result['seconds_min']:>10.6f}s  x{ratio:.2f}")
+        if (ratio > threshold):
+            regressions.append(f"{result['benchmark']} ({result['models']} models) x{ratio:.2f}")
+    return(regressions)
+
+###############################
+# main
+###############################
+def main():
+
+    cli_parser = argparse.ArgumentParser(prog = 'benchmark_map_models_submodels.py',
+        description = '''%(prog)s times map_models_submodels.py on synthetic show files,''')
+
+    ### Define Arguments
+    cli_parser.add_argument('-l', '--logging_level', default = 30, type = int, choices = [0, 10, 20, 30, 40, 50], help = 'Logging Level',
+        required = False)
+    cli_parser.add_argument('--sizes', default = "100,1000,10000", help = 'Comma separated model counts (up to 100000)',
+        required = False)
+    cli_parser.add_argument('-r', '--repeat', default = 3, type = int, help = 'Timed runs per benchmark',
+        required = False)
+    cli_parser.add_argument('--submodels', default = 40, type = int, help = 'Maximum subModels per model',
+        required = False)
+    cli_parser.add_argument('--family_size', default = 20, type = int, help = 'Models per name family',
+        required = False)
+    cli_parser.add_argument('--custom_model_size', default = 20000, type = int, help = 'Length of the dummy CustomModel attribute',
+        required = False)
+    cli_parser.add_argument('-o', '--output', default = None, help = 'Write the JSON results to this file',
+        required = False)
+    cli_parser.add_argument('-c', '--compare', default = None, help = 'Baseline JSON results file to compare with',
+        required = False)
+    cli_parser.add_argument('-t', '--threshold', default = 1.25, type = float, help = 'Slowdown ratio reported as a regression',
+        required = False)
+    cli_parser.add_argument('-g', '--generate', default = None, metavar = 'RGBEFFECTS_FILE',
+        help = 'Only write a synthetic file of the first size and exit', required = False)
+
+    args = cli_parser.parse_args()
+    logging.basicConfig(level = args.logging_level, format = '%(asctime)s - %(levelname)s - %(message)s')
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    if args.generate:
+        generate_rgbeffects(args.generate, sizes[0], args.submodels, args.family_size, args.custom_model_size)
+        print(f"{args.generate}: {sizes[0]} models, {os.path.getsize(args.generate):,} bytes")
+        return(0)
+
+    work_dir = tempfile.mkdtemp(prefix="benchmark_map_models_submodels_")
+    try:
+        results = {
+            "results_version": RESULTS_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {"sizes": sizes, "repeat": args.repeat, "submodels": args.submodels,
+                           "family_size": args.family_size, "custom_model_size": args.custom_model_size},
+            "results": run_benchmarks(sizes, args.repeat, args.submodels, args.family_size, args.custom_model_size, work_dir),
+            }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results_json = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(results_json + "\n")
+    else:
+        print(results_json)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+            exit_code = 1
+    return(exit_code)
+
+if __name__ == "__main__":
+    sys.exit(main())
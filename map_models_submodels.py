@@ -9,17 +9,145 @@
 ###########################
 # Imports                 #
 ###########################
-import tkinter as tk
-from tkinter import ttk
-from tkinter import messagebox
-import xml.etree.ElementTree as ET
+from xml.parsers import expat
 import platform
 import sys
 import os
-import winreg
+import time
 import datetime as dt
 import logging
 import argparse
+import hashlib
+import json
+import tempfile
+import threading
+import queue
+import mmap
+import contextlib
+import tracemalloc
+import bisect
+import heapq
+import collections
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+###########################
+# Constants               #
+###########################
+# Bump CACHE_VERSION whenever the layout of the cached show metadata changes
+CACHE_VERSION = 4
+CACHE_FILE_NAME = ".map_models_submodels_cache.json"
+# Models used by each .xsq sequence, cached per sequence by size and modified time
+SEQUENCE_CACHE_VERSION = 1
+SEQUENCE_CACHE_FILE_NAME = ".map_models_submodels_sequences.json"
+# Show folder sub folders that are never scanned for sequences (xLights backups)
+SEQUENCE_SKIP_FOLDERS = {"Backup"}
+# Byte offsets of the top-level sections and model elements of xlights_rgbeffects.xml, valid for its size and modified time
+OFFSET_INDEX_VERSION = 1
+OFFSET_INDEX_FILE_NAME = ".map_models_submodels_offsets.json"
+# Model attributes longer than this (e.g. the CustomModel grid) are left out of parse_model() details
+MODEL_ATTRIBUTE_MAX_LENGTH = 256
+# Bytes read per parser block (progress and cancel are checked between blocks)
+PARSE_BLOCK_SIZE = 1024 * 1024
+# Milliseconds between checks of xlights_rgbeffects.xml for changes made in xLights
+WATCH_INTERVAL_MS = 2000
+# Suggested mapping models: at most SUGGESTION_COUNT models scoring at least SUGGESTION_MIN_SCORE (0-1)
+SUGGESTION_COUNT = 50
+SUGGESTION_MIN_SCORE = 0.6
+# Weight of the description similarity when both models have a description (the name weighs 1)
+DESCRIPTION_WEIGHT = 0.25
+# Match models by: name family, subModel structure, or both
+MATCH_CHOICES = ("name", "structure", "both")
+# What the model group picked in the Select Primary Model window is used as
+GROUP_USE_TARGETS = "Mapping Targets"
+GROUP_USE_PRIMARY = "Primary Models"
+
+# Use the show folder models cache (set from the command line)
+use_models_cache = True
+
+# Offset index of each xlights_rgbeffects.xml read this run: file -> ((size, mtime), offsets)
+offset_indexes = {}
+
+# GUI modules, imported on first use by import_gui() so batch mode never loads tkinter
+tk = None
+ttk = None
+messagebox = None
+
+###############################
+# Import GUI
+###############################
+def import_gui():
+    global tk, ttk, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as tkinter_ttk
+        from tkinter import messagebox as tkinter_messagebox
+        tk = tkinter
+        ttk = tkinter_ttk
+        messagebox = tkinter_messagebox
+
+###############################
+# Profiler
+###############################
+class Profiler:
+    # Records wall time, peak traced memory and item counts per pipeline stage.
+    # Disabled (the default) a stage costs one attribute check; enable() turns it on for --profile.
+    # Peak memory is only traced with --profile_memory, as tracemalloc slows down the timed stages.
+    # Stages running in worker processes are not recorded, and peak memory is only exact
+    # when stages do not overlap.
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.start_time = time.perf_counter()
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def enable(self, track_memory: bool = False):
+        self.enabled = True
+        self.start_time = time.perf_counter()
+        self.track_memory = track_memory
+        if (track_memory and not tracemalloc.is_tracing()):
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        # Usage: with profiler.stage("xml_parse") as stage: ...; stage["items"] = count
+        record = {"items": 0}
+        if not self.enabled:
+            yield record
+            return
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start_time
+            peak_memory = (tracemalloc.get_traced_memory()[1] - start_memory) if self.track_memory else None
+            with self.lock:
+                stats = self.stages.setdefault(name, {"stage": name, "calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                      "peak_memory_bytes": None, "items": 0})
+                stats["calls"] += 1
+                stats["seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+                stats["items"] += record["items"]
+                if (peak_memory is not None):
+                    stats["peak_memory_bytes"] = max(stats["peak_memory_bytes"] or 0, peak_memory)
+            logging.debug("Stage %s: %.6f seconds, %s items", name, seconds, record["items"])
+
+    def report(self):
+        with self.lock:
+            stages = [dict(stats) for stats in self.stages.values()]
+        for stats in stages:
+            stats["seconds"] = round(stats["seconds"], 6)
+            stats["max_seconds"] = round(stats["max_seconds"], 6)
+        return({"total_seconds": round(time.perf_counter() - self.start_time, 6), "stages": stages})
+
+# Pipeline Stage Profiler (enabled by --profile)
+profiler = Profiler()
 
 ########################################
 # Logging setup
@@ -48,6 +176,8 @@ def read_registry_value(hive, subkey, value_name):
         The data of the specified registry value, or None if the key or value is not found.
     """
 
+    import winreg
+
     try:
         # Open the registry key
         key = winreg.OpenKey(hive, subkey, 0, winreg.KEY_READ)
@@ -119,94 +249,1542 @@ def calcxycoord(window, location, w, h):
 def msgbox(winid, msg):
     messagebox.showinfo(winid, msg)
 
+############################
+# Task Cancelled
+############################
+class TaskCancelled(Exception):
+    # Raised inside a background task when its cancel event is set
+    pass
+
+############################
+# Run Background Task
+############################
+def run_background_task(parent, title: str, task, on_done):
+    """
+    Runs task on a worker thread while a progress window with a Cancel button is shown.
+
+    Args:
+        parent: The window that owns the progress window.
+        title: The progress window title.
+        task: Called on the worker thread as task(progress, cancel_event). progress(fraction, message)
+              may be called from the worker; the task should stop (raise TaskCancelled) once
+              cancel_event is set.
+        on_done: Called on the Tk thread with the task result when the task completes.
+    """
+
+    results_queue = queue.Queue()
+    cancel_event = threading.Event()
+
+    # Progress Window
+    task_win = tk.Toplevel(parent)
+    task_win.title(title)
+    w = 400 # width for task_win
+    h = 120 # height for task_win
+    (x, y) = calcxycoord(task_win, "center", w, h)
+    task_win.geometry('%dx%d+%d+%d' % (w, h, x, y))
+    task_win.transient(parent)
+    message_var = tk.StringVar()
+    message_var.set(title + "...")
+    message_label = tk.Label(task_win, textvariable=message_var, justify=tk.LEFT)
+    message_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+    progress_bar = ttk.Progressbar(task_win, orient=tk.HORIZONTAL, length=380, mode='determinate', maximum=100)
+    progress_bar.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
+    cancel_button = tk.Button(task_win, text="Cancel", command=cancel_event.set)
+    cancel_button.config( width = 15 )
+    cancel_button.grid(row=2, column=0, padx=10, pady=5)
+    task_win.protocol("WM_DELETE_WINDOW", cancel_event.set)
+    task_win.grab_set()
+
+    def progress(fraction: float, message: str):
+        results_queue.put(("progress", fraction, message))
+
+    def worker():
+        try:
+            results_queue.put(("done", task(progress, cancel_event)))
+        except TaskCancelled:
+            results_queue.put(("cancelled",))
+        except Exception as e:
+            logging.exception(f"{title} failed")
+            results_queue.put(("error", e))
+
+    def poll():
+        # Drain the queue on the Tk thread, showing only the latest progress
+        while True:
+            try:
+                item = results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if (item[0] == "progress"):
+                progress_bar["value"] = int(item[1] * 100)
+                message_var.set(item[2])
+                continue
+            task_win.grab_release()
+            task_win.destroy()
+            if (item[0] == "done"):
+                on_done(item[1])
+            elif (item[0] == "cancelled"):
+                logging.info(f"{title} cancelled...")
+                msgbox("Info:", f"{title} cancelled...")
+            else:
+                msgbox("Error:", f"{title} failed: {item[1]}")
+            return
+        if cancel_event.is_set():
+            message_var.set("Cancelling...")
+        task_win.after(100, poll)
+
+    threading.Thread(target=worker, name=title, daemon=True).start()
+    task_win.after(100, poll)
+
+########################################
+# Model Record
+########################################
+class ModelRecord:
+    # Compact model information: __slots__ instead of a per-model dict, interned strings and
+    # an immutable subModels tuple shared by every model with the same subModels (see ModelInterner).
+    # get() and [] accept the keys of the old {"description", "submodels", "fingerprint"} dict.
+    __slots__ = ("description", "submodels", "fingerprint")
+
+    def __init__(self, description: str = "", submodels: tuple = (), fingerprint: str = ""):
+        self.description = description
+        self.submodels = submodels
+        self.fingerprint = fingerprint
+
+    def __getitem__(self, key: str):
+        if key not in ModelRecord.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        if key not in ModelRecord.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, ModelRecord):
+            return NotImplemented
+        return (self.description == other.description and self.submodels == other.submodels
+                and self.fingerprint == other.fingerprint)
+
+    def __repr__(self):
+        return f"ModelRecord({self.description!r}, {self.submodels!r}, {self.fingerprint!r})"
+
+    def to_list(self):
+        # [description, submodels, fingerprint] for the cache file
+        return [self.description, list(self.submodels), self.fingerprint]
+
+########################################
+# Model Interner
+########################################
+class ModelInterner:
+    # Shares equal strings and subModels tuples between the models of one load
+
+    def __init__(self):
+        self.submodels_tuples = {}
+
+    def string(self, text: str):
+        return sys.intern(text)
+
+    def submodels(self, submodels_list):
+        submodels = tuple(sys.intern(submodel) for submodel in submodels_list)
+        return self.submodels_tuples.setdefault(submodels, submodels)
+
+    def record(self, description: str, submodels_list, fingerprint: str):
+        return ModelRecord(sys.intern(description), self.submodels(submodels_list), sys.intern(fingerprint))
+
 ########################################
 # Get Models Submodel(s)
 ########################################
-def get_models_submodels(rgbeffects_file):
-    # RGB Effects Tree
-    effects_tree = ET.parse(rgbeffects_file)
-    # RGB Effects Root
-    effects_root = effects_tree.getroot()
-    logging.debug(f"xlights_rgbeffects.xml = {rgbeffects_file}")
+def get_models_submodels(rgbeffects_file, progress=None, cancel_event=None, model_groups: dict = None,
+                         offsets: dict = None, spans: list = None):
+    # Stream the xlights_rgbeffects.xml file with expat so no element tree is built.
+    # Only models/model names, Descriptions, subModel names and a fingerprint of the
+    # subModel structure are kept; effects, palettes, views and large CustomModel
+    # attributes are discarded as they are read. When a model_groups dictionary is
+    # given it is filled with each modelGroups/modelGroup name and its member names.
+    # When an offsets dictionary is given it is filled with the [start, end) byte spans of
+    # the top-level "sections" and of the "models" elements. With spans (top-level section
+    # spans of an offset index) only those sections are read, through a memory map.
+    logging.debug("xlights_rgbeffects.xml = %s", rgbeffects_file)
+    # Checked once, the handlers below run for every element in the file
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
 
     models_submodels = {}
-    for model in effects_root.findall("models/model"):
-        model_name = model.get("name", "")
-        description = model.get("Description", "")
-        logging.debug(f"*" * 50)
-        logging.debug(f"Model Name: {model_name} {description}")
-        logging.debug(f"*" * 50)
-        model_info = {}
-        submodels_list = []
-        for submodel in model.findall("subModel"):
-            submodel_name = submodel.get("name")
+    interner = ModelInterner()
+    # Element Path Depth (1 = root, 2 = models, 3 = model, 4 = subModel)
+    depth = 0
+    in_models = False
+    in_model_groups = False
+    submodels_list = None
+    model_info = None
+    submodels_structure = None
+    # Byte Offsets: each span ends where the next sibling starts (or at its parent's end tag)
+    record_offsets = (offsets is not None and spans is None)
+    section_spans = {}
+    model_spans = {}
+    last_section = None
+    last_model = None
+    if record_offsets:
+        offsets["sections"] = section_spans
+        offsets["models"] = model_spans
+
+    def start_element(tag, attrs):
+        nonlocal depth, in_models, in_model_groups, submodels_list, model_info, submodels_structure, last_section, last_model
+        depth += 1
+        if (depth == 2):
+            if record_offsets:
+                index = parser.CurrentByteIndex
+                if (last_section is not None):
+                    last_section[1] = index
+                if (tag in section_spans):
+                    last_section = None
+                else:
+                    last_section = section_spans[tag] = [index, index]
+            in_models = (tag == "models")
+            in_model_groups = (tag == "modelGroups" and model_groups is not None)
+        elif (depth == 3 and in_model_groups and tag == "modelGroup"):
+            members = [member.strip() for member in attrs.get("models", "").split(",")]
+            model_groups[sys.intern(attrs.get("name", ""))] = tuple(sys.intern(member) for member in members if member)
+        elif (depth == 3 and in_models and tag == "model"):
+            model_name = attrs.get("name", "")
+            description = attrs.get("Description", "")
+            if debug:
+                logging.debug("*" * 50)
+                logging.debug("Model Name: %s %s", model_name, description)
+                logging.debug("*" * 50)
+            submodels_list = []
+            submodels_structure = []
+            # Update Model Information
+            model_info = interner.record(description, (), "")
+            models_submodels[sys.intern(model_name)] = model_info
+            if record_offsets:
+                index = parser.CurrentByteIndex
+                if (last_model is not None):
+                    last_model[1] = index
+                last_model = model_spans[model_name] = [index, index]
+        elif (depth == 4 and submodels_list is not None and tag == "subModel"):
+            submodel_name = attrs.get("name")
             # Not Comment?
             if (submodel_name and submodel_name[0] != "*"):
                 submodels_list.append(submodel_name)
-                logging.debug(f"+++ SubModel Name = {submodel_name}")
-        # Update Model Information
-        models_submodels[model_name] = {"description": description, "submodels": submodels_list}
+                submodels_structure.append(submodel_structure(attrs))
+                if debug:
+                    logging.debug("+++ SubModel Name = %s", submodel_name)
+
+    def end_element(tag):
+        nonlocal depth, in_models, in_model_groups, submodels_list, model_info, submodels_structure, last_section, last_model
+        if (depth == 3):
+            if (model_info is not None):
+                model_info.submodels = interner.submodels(submodels_list)
+                model_info.fingerprint = interner.string(submodels_fingerprint(submodels_structure))
+            submodels_list = None
+            model_info = None
+            submodels_structure = None
+        elif (depth == 2):
+            if (in_models and last_model is not None):
+                last_model[1] = parser.CurrentByteIndex
+                last_model = None
+            in_models = False
+            in_model_groups = False
+        elif (depth == 1 and last_section is not None):
+            last_section[1] = parser.CurrentByteIndex
+        depth -= 1
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    try:
+        with open(rgbeffects_file, 'rb') as f:
+            if spans is None:
+                total_bytes = os.fstat(f.fileno()).st_size
+            else:
+                total_bytes = sum(end - start for start, end in spans)
+            bytes_read = 0
+            for block in read_blocks(f, spans):
+                if (cancel_event is not None and cancel_event.is_set()):
+                    raise TaskCancelled()
+                parser.Parse(block, False)
+                bytes_read += len(block)
+                if progress:
+                    progress(min(bytes_read / max(total_bytes, 1), 1.0), f"{bytes_read // 1024:,} of {total_bytes // 1024:,} KB read, {len(models_submodels):,} models parsed")
+            parser.Parse(b"", True)
+    finally:
+        # The handlers refer to the parser (for CurrentByteIndex): break the reference cycle so the
+        # parse state is freed now rather than by the cyclic garbage collector
+        parser.StartElementHandler = None
+        parser.EndElementHandler = None
+    return(models_submodels)
+
+###############################
+# Read Blocks
+###############################
+def read_blocks(f, spans: list = None):
+    # PARSE_BLOCK_SIZE blocks of the whole file, or of only the [start, end) section spans
+    # read through a memory map and wrapped in a root element so they parse as one document
+    if spans is None:
+        yield from iter(lambda: f.read(PARSE_BLOCK_SIZE), b"")
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield b"<xrgb>"
+        for start, end in spans:
+            for offset in range(start, end, PARSE_BLOCK_SIZE):
+                yield mm[offset:min(offset + PARSE_BLOCK_SIZE, end)]
+        yield b"</xrgb>"
+
+###############################
+# SubModel Structure
+###############################
+def submodel_structure(attrs: dict):
+    # (name, type, layout, subBuffer, node ranges...) of a subModel element; line0, line1, ... hold the node ranges
+    lines = sorted((int(key[4:]), value) for key, value in attrs.items() if key.startswith("line") and key[4:].isdigit())
+    return((attrs.get("name", ""), attrs.get("type", ""), attrs.get("layout", ""), attrs.get("subBuffer", ""))
+           + tuple(value for index, value in lines))
+
+###############################
+# SubModels Fingerprint
+###############################
+def submodels_fingerprint(submodels_structure: list):
+    # Hash of a model's subModel structures; "" for a model without subModels
+    if not submodels_structure:
+        return("")
+    return(hashlib.blake2b(repr(submodels_structure).encode('utf-8'), digest_size=8).hexdigest())
+
+###############################
+# Hash File
+###############################
+def hash_file(file_name: str):
+    # SHA-256 of the file contents, read in 1MB blocks
+    sha = hashlib.sha256()
+    with open(file_name, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return(sha.hexdigest())
+
+###############################
+# Read Models Cache
+###############################
+def read_models_cache(cache_file: str, rgbeffects_file: str, model_groups: dict = None):
+    """
+    Reads the parsed models_submodels from the show folder cache file.
+
+    Args:
+        cache_file: The cache file in the show folder.
+        rgbeffects_file: The xlights_rgbeffects.xml file the cache was built from.
+        model_groups: Optional dictionary filled with the cached model groups.
+
+    Returns:
+        The cached models_submodels dictionary, or None if the cache is missing, stale or corrupt.
+    """
+
+    if not os.path.isfile(cache_file):
+        logging.debug(f"Models cache {cache_file} not found")
+        return None
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if (cache.get("cache_version") != CACHE_VERSION):
+            logging.info(f"Models cache {cache_file} version {cache.get('cache_version')} != {CACHE_VERSION}, rebuilding...")
+            return None
+        stat = os.stat(rgbeffects_file)
+        if (cache["size"] != stat.st_size):
+            logging.info(f"Models cache {cache_file} is stale (size changed), rebuilding...")
+            return None
+        # Same size and mtime? Trust the cache without re-hashing the show file
+        if (cache["mtime_ns"] != stat.st_mtime_ns):
+            # Touched or copied but possibly unchanged, confirm with the content hash
+            if (cache["sha256"] != hash_file(rgbeffects_file)):
+                logging.info(f"Models cache {cache_file} is stale (content changed), rebuilding...")
+                return None
+            cache["mtime_ns"] = stat.st_mtime_ns
+            write_cache_file(cache_file, cache)
+        cached_models = cache["models_submodels"]
+        if not isinstance(cached_models, dict):
+            raise ValueError("models_submodels is not a dictionary")
+        interner = ModelInterner()
+        models_submodels = {}
+        for model, (description, submodels, fingerprint) in cached_models.items():
+            models_submodels[sys.intern(model)] = interner.record(description, submodels, fingerprint)
+        if (model_groups is not None):
+            model_groups.update({sys.intern(group): tuple(sys.intern(member) for member in members)
+                                 for group, members in cache["model_groups"].items()})
+        return models_submodels
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.warning(f"Models cache {cache_file} is corrupt ({e}), rebuilding...")
+        return None
+
+###############################
+# Write Cache File
+###############################
+def write_cache_file(cache_file: str, cache: dict):
+    # Write to a temporary file and rename so a partially written cache is never read
+    cache_dir = os.path.dirname(cache_file) or "."
+    try:
+        fd, temp_file = tempfile.mkstemp(prefix=".map_models_submodels_", suffix=".tmp", dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, separators=(',', ':'))
+            os.replace(temp_file, cache_file)
+        except BaseException:
+            os.remove(temp_file)
+            raise
+    except OSError as e:
+        logging.warning(f"Unable to write cache {cache_file}: {e}")
+
+###############################
+# Write Models Cache
+###############################
+def write_models_cache(cache_file: str, stat, sha256: str, models_submodels: dict, model_groups: dict):
+    cache = {
+        "cache_version": CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "models_submodels": {model: model_info.to_list() for model, model_info in models_submodels.items()},
+        "model_groups": {group: list(members) for group, members in model_groups.items()},
+        }
+    write_cache_file(cache_file, cache)
+    logging.debug(f"Models cache {cache_file} written")
+
+###############################
+# Load Models Submodel(s)
+###############################
+def load_models_submodels(rgbeffects_file: str, use_cache: bool = True, progress=None, cancel_event=None,
+                          model_groups: dict = None):
+    # Load models_submodels (and fill model_groups, when given) from the show folder cache,
+    # parsing and re-caching when stale
+    cache_file = os.path.join(os.path.dirname(rgbeffects_file), CACHE_FILE_NAME)
+    # The model groups are always parsed, so the cache holds them for every caller
+    parsed_groups = {}
+    if use_cache:
+        with profiler.stage("cache_read") as stage:
+            models_submodels = read_models_cache(cache_file, rgbeffects_file, parsed_groups)
+            stage["items"] = len(models_submodels or {})
+        if (models_submodels is not None):
+            logging.info(f"Loaded {len(models_submodels)} models from cache {cache_file}")
+            if (model_groups is not None):
+                model_groups.update(parsed_groups)
+            return(models_submodels)
+        parsed_groups.clear()
+    # Fingerprint the file before parsing so a concurrent save invalidates the new cache
+    stat = os.stat(rgbeffects_file)
+    sha256 = hash_file(rgbeffects_file) if use_cache else None
+    # Offset Index still valid (e.g. the models cache was from an older version)? Only read the models and modelGroups sections
+    index_file = os.path.join(os.path.dirname(rgbeffects_file), OFFSET_INDEX_FILE_NAME)
+    offsets = read_offset_index(index_file, rgbeffects_file) if use_cache else None
+    spans = None
+    if (offsets is not None and "models" in offsets["sections"]):
+        spans = sorted(offsets["sections"][tag] for tag in ("models", "modelGroups") if tag in offsets["sections"])
+        logging.info(f"Reading the models sections of {rgbeffects_file} from offset index {index_file}")
+    elif use_cache:
+        offsets = {}
+    with profiler.stage("xml_parse") as stage:
+        models_submodels = get_models_submodels(rgbeffects_file, progress, cancel_event, parsed_groups, offsets, spans)
+        stage["items"] = len(models_submodels)
+    if use_cache:
+        if spans is None:
+            with profiler.stage("offset_index_write") as stage:
+                write_offset_index(index_file, stat, offsets)
+                stage["items"] = len(offsets["models"])
+        offset_indexes[rgbeffects_file] = ((stat.st_size, stat.st_mtime_ns), offsets)
+    if use_cache:
+        with profiler.stage("cache_write") as stage:
+            write_models_cache(cache_file, stat, sha256, models_submodels, parsed_groups)
+            stage["items"] = len(models_submodels)
+    if (model_groups is not None):
+        model_groups.update(parsed_groups)
     return(models_submodels)
 
+###############################
+# Read Offset Index
+###############################
+def read_offset_index(index_file: str, rgbeffects_file: str):
+    # The byte offsets of the show folder offset index file, or None if it is missing, corrupt or the
+    # size or modified time of xlights_rgbeffects.xml no longer match (any edit moves the offsets)
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(rgbeffects_file)
+        if (index.get("index_version") != OFFSET_INDEX_VERSION or index["size"] != stat.st_size
+            or index["mtime_ns"] != stat.st_mtime_ns):
+            logging.debug("Offset index %s is stale", index_file)
+            return None
+        if not (isinstance(index["sections"], dict) and isinstance(index["models"], dict)):
+            raise ValueError("sections and models are not dictionaries")
+        return({"sections": index["sections"], "models": index["models"]})
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.warning(f"Offset index {index_file} is corrupt ({e}), rebuilding...")
+        return None
+
+###############################
+# Write Offset Index
+###############################
+def write_offset_index(index_file: str, stat, offsets: dict):
+    index = {
+        "index_version": OFFSET_INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sections": offsets["sections"],
+        "models": offsets["models"],
+        }
+    write_cache_file(index_file, index)
+
+###############################
+# Load Offset Index
+###############################
+def load_offset_index(rgbeffects_file: str, use_cache: bool = True, progress=None, cancel_event=None):
+    # The offset index of xlights_rgbeffects.xml: kept for this run, else read from the show folder,
+    # else rebuilt by a streaming scan (and written, unless the cache is not used)
+    signature = file_signature(rgbeffects_file)
+    if signature is None:
+        raise FileNotFoundError(f"xLights RGB Effects XML File {rgbeffects_file} not found")
+    loaded = offset_indexes.get(rgbeffects_file)
+    if (loaded is not None and loaded[0] == signature):
+        return(loaded[1])
+    index_file = os.path.join(os.path.dirname(rgbeffects_file), OFFSET_INDEX_FILE_NAME)
+    offsets = read_offset_index(index_file, rgbeffects_file) if use_cache else None
+    if offsets is None:
+        stat = os.stat(rgbeffects_file)
+        offsets = {}
+        with profiler.stage("offset_index_build") as stage:
+            get_models_submodels(rgbeffects_file, progress, cancel_event, offsets=offsets)
+            stage["items"] = len(offsets["models"])
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if use_cache:
+            write_offset_index(index_file, stat, offsets)
+    offset_indexes[rgbeffects_file] = (signature, offsets)
+    return(offsets)
+
+###############################
+# Parse Model
+###############################
+def parse_model(rgbeffects_file: str, model: str, use_cache: bool = True, progress=None, cancel_event=None):
+    """
+    Parses a single model element of xlights_rgbeffects.xml on demand, reading only its bytes
+    (found through the offset index) from a memory map of the file.
+
+    Args:
+        rgbeffects_file: The xlights_rgbeffects.xml file.
+        model: The model name.
+        use_cache: Read (and write) the offset index file in the show folder.
+        progress: Optional progress(fraction, message) callback while the offset index is rebuilt.
+        cancel_event: Optional threading.Event that cancels rebuilding the offset index.
+
+    Returns:
+        Dictionary of the model "name", its "attributes" (without values longer than
+        MODEL_ATTRIBUTE_MAX_LENGTH) and the attributes of each of its "submodels".
+    """
+
+    span = load_offset_index(rgbeffects_file, use_cache, progress, cancel_event)["models"].get(model)
+    if span is None:
+        raise KeyError(f"Unknown model: {model}")
+    start, end = span
+    with open(rgbeffects_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    details = {"name": model, "attributes": {}, "submodels": []}
+    depth = 0
+
+    def start_element(tag, attrs):
+        nonlocal depth
+        depth += 1
+        if (depth == 1):
+            if (tag != "model" or attrs.get("name") != model):
+                raise ValueError(f"Offset index of {rgbeffects_file} does not match model {model}")
+            details["attributes"] = {key: value for key, value in attrs.items() if len(value) <= MODEL_ATTRIBUTE_MAX_LENGTH}
+        elif (depth == 2 and tag == "subModel"):
+            details["submodels"].append(attrs)
+
+    def end_element(tag):
+        nonlocal depth
+        depth -= 1
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    try:
+        parser.Parse(data, True)
+    except expat.ExpatError as e:
+        raise ValueError(f"Offset index of {rgbeffects_file} does not match model {model}: {e}")
+    return(details)
+
+###############################
+# Model Details Report
+###############################
+def model_details_report(details: dict, max_lines: int = None):
+    # The model attributes and its subModels with their node ranges, one per line
+    attributes = details["attributes"]
+    lines = [f"{details['name']} ({attributes.get('DisplayAs', '')}, {len(details['submodels'])} subModels)"]
+    if attributes.get("Description"):
+        lines.append(attributes["Description"])
+    for submodel in details["submodels"]:
+        ranges = [value for index, value in sorted((int(key[4:]), value) for key, value in submodel.items()
+                                                   if key.startswith("line") and key[4:].isdigit())]
+        lines.append(f"  {submodel.get('name', '')}: {', '.join(ranges)}")
+    if (max_lines is not None and len(lines) > max_lines):
+        lines = lines[:max_lines] + [f"  ... {len(lines) - max_lines} more"]
+    return("\n".join(lines))
+
+###############################
+# Get Sequence Models
+###############################
+def get_sequence_models(sequence_file: str, cancel_event=None):
+    # Stream an .xsq sequence with expat and return the sorted names of the models (ElementEffects/Element
+    # type="model") that have at least one effect on any layer, strand or subModel. Effect settings are not kept.
+    used_models = set()
+    # Element Path Depth (1 = xsequence, 2 = ElementEffects, 3 = Element)
+    depth = 0
+    in_element_effects = False
+    element = None
+
+    def start_element(tag, attrs):
+        nonlocal depth, in_element_effects, element
+        depth += 1
+        if (depth == 2):
+            in_element_effects = (tag == "ElementEffects")
+        elif (depth == 3 and in_element_effects and tag == "Element" and attrs.get("type", "model") == "model"):
+            element = attrs.get("name")
+        elif (element is not None and tag == "Effect"):
+            used_models.add(element)
+
+    def end_element(tag):
+        nonlocal depth, in_element_effects, element
+        if (depth == 3):
+            element = None
+        elif (depth == 2):
+            in_element_effects = False
+        depth -= 1
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    with open(sequence_file, 'rb') as f:
+        while True:
+            if (cancel_event is not None and cancel_event.is_set()):
+                raise TaskCancelled()
+            block = f.read(PARSE_BLOCK_SIZE)
+            parser.Parse(block, not block)
+            if not block:
+                break
+    return(sorted(used_models))
+
+###############################
+# Scan Sequence File Job
+###############################
+def scan_sequence_file_job(sequence_file: str):
+    # Worker entry point (module level so it can be pickled for a process pool)
+    try:
+        return((sequence_file, get_sequence_models(sequence_file), None))
+    except (OSError, expat.ExpatError) as e:
+        return((sequence_file, None, str(e)))
+
+###############################
+# Find Sequence Files
+###############################
+def find_sequence_files(show_folder: str):
+    # .xsq files in the show folder and its sub folders, skipping backups and hidden folders
+    sequence_files = []
+    for folder, sub_folders, file_names in os.walk(show_folder):
+        sub_folders[:] = sorted(sub_folder for sub_folder in sub_folders
+                                if sub_folder not in SEQUENCE_SKIP_FOLDERS and not sub_folder.startswith("."))
+        sequence_files.extend(os.path.join(folder, file_name).replace("\\", "/")
+                              for file_name in sorted(file_names) if file_name.lower().endswith(".xsq"))
+    return(sequence_files)
+
+###############################
+# Read Sequence Cache
+###############################
+def read_sequence_cache(cache_file: str):
+    # {sequence path relative to the show folder: [size, mtime_ns, models]}, empty when missing or corrupt
+    if not os.path.isfile(cache_file):
+        return({})
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if (cache.get("cache_version") != SEQUENCE_CACHE_VERSION):
+            logging.info(f"Sequence cache {cache_file} version {cache.get('cache_version')} != {SEQUENCE_CACHE_VERSION}, rescanning...")
+            return({})
+        sequences = cache["sequences"]
+        if not isinstance(sequences, dict):
+            raise ValueError("sequences is not a dictionary")
+        return(sequences)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.warning(f"Sequence cache {cache_file} is corrupt ({e}), rescanning...")
+        return({})
+
+###############################
+# Scan Sequences
+###############################
+def scan_sequences(show_folder: str, workers: int = None, use_processes: bool = False, use_cache: bool = True,
+                   progress=None, cancel_event=None):
+    """
+    Builds the index of the models each .xsq sequence in the show folder uses.
+
+    Args:
+        show_folder: The xLights show folder.
+        workers: Maximum number of scan workers, default is the executor default.
+        use_processes: Use a process pool instead of a thread pool.
+        use_cache: Only re-scan the sequences whose size or modified time changed since the last scan.
+        progress: Optional progress(fraction, message) callback.
+        cancel_event: Optional threading.Event; the scan raises TaskCancelled when it is set.
+
+    Returns:
+        Dictionary of sequence path (relative to the show folder) to the sorted list of used models.
+    """
+
+    show_folder = show_folder.replace("\\", "/")
+    cache_file = os.path.join(show_folder, SEQUENCE_CACHE_FILE_NAME)
+    with profiler.stage("sequence_scan") as stage:
+        cached_sequences = read_sequence_cache(cache_file) if use_cache else {}
+        sequences = {}
+        signatures = {}
+        scan_files = []
+        for sequence_file in find_sequence_files(show_folder):
+            sequence = os.path.relpath(sequence_file, show_folder).replace("\\", "/")
+            signature = file_signature(sequence_file)
+            if signature is None:
+                continue
+            cached = cached_sequences.get(sequence)
+            if (cached is not None and tuple(cached[:2]) == signature):
+                sequences[sequence] = cached[2]
+            else:
+                signatures[sequence] = signature
+                scan_files.append(sequence_file)
+        logging.info(f"Sequences in {show_folder}: {len(sequences) + len(scan_files)}, {len(scan_files)} to scan")
+
+        def scanned(result: tuple, done_count: int):
+            sequence_file, models, error = result
+            sequence = os.path.relpath(sequence_file, show_folder).replace("\\", "/")
+            if (error is not None):
+                logging.error(f"Unable to scan sequence {sequence_file}: {error}")
+                signatures.pop(sequence, None)
+            else:
+                sequences[sequence] = models
+            if progress:
+                progress(done_count / len(scan_files), f"{done_count} of {len(scan_files)} sequences scanned")
+
+        if (len(scan_files) <= 1 or workers == 1):
+            for done_count, sequence_file in enumerate(scan_files, 1):
+                if (cancel_event is not None and cancel_event.is_set()):
+                    raise TaskCancelled()
+                scanned(scan_sequence_file_job(sequence_file), done_count)
+        else:
+            executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with executor_class(max_workers=workers) as executor:
+                futures = [executor.submit(scan_sequence_file_job, sequence_file) for sequence_file in scan_files]
+                for done_count, future in enumerate(as_completed(futures), 1):
+                    if (cancel_event is not None and cancel_event.is_set()):
+                        for pending in futures:
+                            pending.cancel()
+                        raise TaskCancelled()
+                    scanned(future.result(), done_count)
+
+        if (use_cache and (scan_files or set(cached_sequences) != set(sequences))):
+            write_cache_file(cache_file, {
+                "cache_version": SEQUENCE_CACHE_VERSION,
+                "sequences": {sequence: list(signatures[sequence]) + [models] if sequence in signatures
+                              else cached_sequences[sequence] for sequence, models in sequences.items()},
+                })
+        stage["items"] = len(sequences)
+    return(dict(sorted(sequences.items())))
+
+###############################
+# Get Used Models
+###############################
+def get_used_models(sequences: dict, group_index=None):
+    # Models used by any sequence of a scan_sequences() index; with a ModelGroupIndex the
+    # model groups that have effects count their member models as used
+    used_models = {model for models in sequences.values() for model in models}
+    if (group_index is not None):
+        for group in [model for model in used_models if model in group_index.model_groups]:
+            used_models.update(group_index.expand(group))
+    return(used_models)
+
+###############################
+# Mapping File Path
+###############################
+def mapping_file_path(show_folder: str, primary_model: str, merge: bool = False):
+    # ex: "<show folder>/03.15.0Mod SHOWSTOPPER SNOWFLAKE_mapping_2025_06_16.xmap"
+    # When merging, the primary model's latest existing mapping file (if any) is used instead
+    if merge:
+        mapping_file_name = find_mapping_file(show_folder, primary_model)
+        if (mapping_file_name is not None):
+            return(mapping_file_name)
+    return(show_folder + "/" + primary_model + "_mapping_" + str(dt.date.today()).replace('-', '_') + ".xmap")
+
+###############################
+# Find Mapping File
+###############################
+def find_mapping_file(show_folder: str, primary_model: str):
+    # The primary model's mapping file with the latest date, or None
+    prefix = primary_model + "_mapping_"
+    try:
+        file_names = [file_name for file_name in os.listdir(show_folder)
+                      if file_name.startswith(prefix) and file_name.endswith(".xmap")
+                      and len(file_name) == len(prefix) + len("2025_06_16.xmap")]
+    except OSError:
+        return None
+    if not file_names:
+        return None
+    return(show_folder + "/" + max(file_names))
+
+###############################
+# Mapping File Primary Model
+###############################
+def mapping_file_primary_model(mapping_file_name: str):
+    # The primary model of a <primary>_mapping_YYYY_MM_DD.xmap file name, else None
+    file_name = os.path.basename(mapping_file_name)
+    suffix_length = len("_mapping_2025_06_16.xmap")
+    if (len(file_name) <= suffix_length or not file_name.endswith(".xmap")
+            or file_name[-suffix_length:-len("2025_06_16.xmap")] != "_mapping_"):
+        return None
+    try:
+        dt.datetime.strptime(file_name[-len("2025_06_16.xmap"):-len(".xmap")], "%Y_%m_%d")
+    except ValueError:
+        return None
+    return(file_name[:-suffix_length])
+
 ###############################
 # Create Mapping File
 ###############################
-def create_mapping_file(mapping_file_name: str, primary_model: str, submodels_list: list, mapping_models: list):
-    logging.debug(f"mapping_file_name: {mapping_file_name}")
-    logging.debug(f"primary_model: {primary_model}")
+def create_mapping_file(mapping_file_name: str, primary_model: str, submodels_list: list, mapping_models: list,
+                        merge: bool = False, kept_targets: list = None):
+    logging.debug("mapping_file_name: %s", mapping_file_name)
+    logging.debug("primary_model: %s", primary_model)
+    logging.debug("mapping_models: %s", mapping_models)
+    if (kept_targets is not None and os.path.isfile(mapping_file_name)):
+        # Regenerate the existing mapping file (see MappingFile.regenerate)
+        with profiler.stage("mapping_regenerate") as stage:
+            mapping_file = MappingFile.read(mapping_file_name).regenerate(primary_model, submodels_list, mapping_models, kept_targets)
+            write_text_file(mapping_file_name, mapping_file.text())
+            stage["items"] = len(mapping_file.targets)
+        logging.info("Mapping File %s regenerated...", mapping_file_name)
+        return
+    if (merge and os.path.isfile(mapping_file_name)):
+        # Add the missing targets and rows to the existing mapping file
+        with profiler.stage("mapping_merge") as stage:
+            mapping_file = MappingFile.read(mapping_file_name)
+            changed_rows = mapping_file.merge(primary_model, submodels_list, mapping_models)
+            if changed_rows:
+                write_text_file(mapping_file_name, mapping_file.text())
+            stage["items"] = changed_rows
+        if changed_rows:
+            logging.info("Mapping File %s merged (%d rows added)...", mapping_file_name, changed_rows)
+        else:
+            logging.info("Mapping File %s unchanged...", mapping_file_name)
+        return
+    with profiler.stage("mapping_write") as stage:
+        write_mapping_lines(mapping_file_name, primary_model, submodels_list, mapping_models)
+        stage["items"] = len(mapping_models) * (1 + len(submodels_list))
+    logging.info("Mapping File %s created...", mapping_file_name)
+    return
+
+###############################
+# Write Mapping Lines
+###############################
+def write_mapping_lines(mapping_file_name: str, primary_model: str, submodels_list: list, mapping_models: list):
+    # Build the whole file in memory: header, target model list, then model and submodel rows
+    lines = ["false", str(len(mapping_models))]
+    lines.extend(mapping_models)
+    submodel_sources = mapping_submodel_sources(primary_model, submodels_list)
     for mapping_model in mapping_models:
-        logging.debug(f"mapping_model: {mapping_model}")
-    with open(mapping_file_name, 'w') as f:
-        f.write("false\n")
-        f.write(str(len(mapping_models)) + "\n")
-        for mapping_model in mapping_models:
-            f.write(mapping_model + "\n")
+        lines.extend(mapping_target_lines(mapping_model, primary_model, submodel_sources))
+    lines.append("")
+    write_text_file(mapping_file_name, "\n".join(lines))
+
+###############################
+# Mapping SubModel Sources
+###############################
+def mapping_submodel_sources(primary_model: str, submodels_list: list):
+    # The part of each subModel row after the target model name
+    return([submodel + "\t\t" + primary_model + "/" + submodel + "\twhite" for submodel in submodels_list])
+
+###############################
+# Mapping Target Lines
+###############################
+def mapping_target_lines(mapping_model: str, primary_model: str, submodel_sources: list):
+    # The model row and subModel rows mapping one target model to the primary model
+    lines = [mapping_model + "\t\t\t" + primary_model + "\twhite"]
+    submodel_prefix = mapping_model + "\t"
+    lines.extend([submodel_prefix + submodel_source for submodel_source in submodel_sources])
+    return(lines)
+
+###############################
+# Write Text File
+###############################
+def write_text_file(file_name: str, text: str):
+    # Write a temporary file next to the file and rename it into place,
+    # so xLights never sees a partially written .xmap
+    temp_file = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file, 'w') as f:
+            f.write(text)
+        os.replace(temp_file, file_name)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+###############################
+# Mapping File
+###############################
+class MappingFile:
+    # Row index of an .xmap file. The header and target model list are parsed, but the rows of
+    # each target are kept as one block of text and only split into rows (keyed by target model,
+    # subModel and node) when a merge changes that target, so updating a large mapping file costs
+    # about as much as the rows that were added plus copying the unchanged blocks.
+
+    def __init__(self, header: str = "false", targets: list = None, blocks: dict = None):
+        self.header = header
+        self.targets = list(targets or [])
+        # Target model -> its rows, each ending with "\n"
+        self.blocks = dict(blocks or {})
+
+    @classmethod
+    def read(cls, mapping_file_name: str):
+        # Stream the header and target list, then locate each target's block of rows in the rest of the file
+        with open(mapping_file_name, 'r') as f:
+            header = f.readline().rstrip("\n")
+            count = int(f.readline())
+            # A target listed more than once (e.g. edited by hand) is kept once
+            targets = list(dict.fromkeys(f.readline().rstrip("\n") for i in range(count)))
+            rows_text = f.read()
+        if (rows_text and not rows_text.endswith("\n")):
+            rows_text += "\n"
+        mapping_file = cls(header, targets)
+        mapping_file.blocks = cls.find_blocks(targets, rows_text)
+        return(mapping_file)
+
+    @staticmethod
+    def find_blocks(targets: list, rows_text: str):
+        # The rows written by create_mapping_file are grouped by target, so each target's block
+        # runs from its first row to the next target's first row. Rows that are not grouped
+        # that way (e.g. edited by hand) are grouped line by line instead.
+        starts = []
+        position = 0
+        grouped = True
+        for target in targets:
+            # Each block is searched for after the previous one, so the file is scanned once
+            prefix = target + "\t"
+            if (position == 0 and rows_text.startswith(prefix)):
+                start = 0
+            else:
+                start = rows_text.find("\n" + prefix, position) + 1
+                if (start == 0):
+                    grouped = False
+                    break
+            starts.append((start, target))
+            position = start
+        blocks = {}
+        grouped = grouped and ((not starts and not rows_text) or (starts and starts[0][0] == 0))
+        for i, (start, target) in enumerate(starts if grouped else []):
+            end = starts[i + 1][0] if (i + 1 < len(starts)) else len(rows_text)
+            block = rows_text[start:end]
+            if (block.count("\n") != ("\n" + block).count("\n" + target + "\t")):
+                grouped = False
+                break
+            blocks[target] = block
+        if grouped:
+            return(blocks)
+        lines = {}
+        for line in rows_text.splitlines():
+            if line:
+                lines.setdefault(line.split("\t", 1)[0], []).append(line + "\n")
+        return({target: "".join(target_lines) for target, target_lines in lines.items()})
+
+    def generated_from(self, primary_model: str):
+        # True when every row is one create_mapping_file writes for primary_model: the target model row mapped
+        # from primary_model and subModel rows mapped from the same "primary_model/subModel", without nodes, in white
+        for block in self.blocks.values():
+            for line in block.splitlines():
+                fields = line.split("\t")
+                if (len(fields) != 5 or fields[2] or fields[4] != "white"):
+                    return(False)
+                if (fields[3] != (primary_model + "/" + fields[1] if fields[1] else primary_model)):
+                    return(False)
+        return(True)
+
+    def regenerate(self, primary_model: str, submodels_list: list, mapping_models: list, kept_targets: list):
+        # A copy with new rows for mapping_models, the existing rows of kept_targets (e.g. model groups), and
+        # the targets that are in neither list dropped, in this file's own target order
+        targets = set(mapping_models).union(kept_targets)
+        mapping_file = MappingFile(self.header, [target for target in self.targets if target in targets],
+                                   {target: self.blocks[target] for target in kept_targets if target in self.blocks})
+        mapping_file.merge(primary_model, submodels_list, mapping_models)
+        return(mapping_file)
+
+    @staticmethod
+    def row_key(line: str):
+        # Target model, subModel and node
+        return(line.split("\t", 3)[:3])
+
+    def merge(self, primary_model: str, submodels_list: list, mapping_models: list, replace_rows: bool = False):
+        """
+        Merges the rows mapping mapping_models to primary_model into the mapping file.
+
+        Args:
+            primary_model: The primary model.
+            submodels_list: The primary model's subModels.
+            mapping_models: The target models.
+            replace_rows: Replace existing rows with the same key, by default existing rows are kept.
+
+        Returns:
+            Number of rows (and target list entries) added or replaced.
+        """
+
+        changed_rows = 0
+        targets = set(self.targets)
+        submodel_sources = mapping_submodel_sources(primary_model, submodels_list)
         for mapping_model in mapping_models:
-            f.write(mapping_model + "\t\t\t" + primary_model + "\twhite\n")
-            for submodel in submodels_list:
-                f.write(mapping_model + "\t" + submodel + "\t\t" + primary_model + "/" + submodel + "\twhite\n")
-    logging.info(f"Mapping File {mapping_file_name} created...")
-    msgbox("Info:", f"Mapping File {mapping_file_name} created...")
-    return
+            lines = mapping_target_lines(mapping_model, primary_model, submodel_sources)
+            block = "\n".join(lines) + "\n"
+            existing_block = self.blocks.get(mapping_model)
+            if (mapping_model not in targets):
+                self.targets.append(mapping_model)
+                targets.add(mapping_model)
+                if (existing_block is not None):
+                    changed_rows += 1
+            if (existing_block is None):
+                self.blocks[mapping_model] = block
+                changed_rows += len(lines)
+                continue
+            if (existing_block == block):
+                continue
+            # Only this target's rows are split: add the missing keys (and replace changed rows)
+            rows = {}
+            for line in existing_block.splitlines():
+                rows.setdefault(tuple(self.row_key(line)), line)
+            for line in lines:
+                key = tuple(self.row_key(line))
+                if (key not in rows or (replace_rows and rows[key] != line)):
+                    rows[key] = line
+                    changed_rows += 1
+            self.blocks[mapping_model] = "\n".join(rows.values()) + "\n"
+        return(changed_rows)
+
+    def text(self):
+        # Header, target list, then the rows of each target (and of any rows without a listed target)
+        parts = [self.header + "\n" + str(len(self.targets)) + "\n"]
+        parts.extend(target + "\n" for target in self.targets)
+        parts.extend(self.blocks.get(target, "") for target in dict.fromkeys(self.targets))
+        targets = set(self.targets)
+        parts.extend(block for target, block in self.blocks.items() if target not in targets)
+        return("".join(parts))
+
+###############################
+# Create Mapping File Job
+###############################
+def create_mapping_file_job(job: tuple):
+    # Run one create_mapping_file job, returning (mapping_file_name, error message or None)
+    mapping_file_name = job[0]
+    try:
+        create_mapping_file(*job)
+        return((mapping_file_name, None))
+    except Exception as e:
+        logging.error(f"Mapping File {mapping_file_name} failed: {e}")
+        return((mapping_file_name, str(e)))
+
+###############################
+# Generate Mapping Files
+###############################
+def generate_mapping_files(jobs: list, workers: int = None, use_processes: bool = False, progress=None, cancel_event=None):
+    """
+    Creates mapping files in parallel.
+
+    Args:
+        jobs: List of (mapping_file_name, primary_model, submodels_list, mapping_models[, merge]) tuples.
+        workers: Maximum number of workers, default is the executor default.
+        use_processes: Use a process pool instead of a thread pool.
+        progress: Optional progress(fraction, message) callback.
+        cancel_event: Optional threading.Event; jobs not yet started when it is set are cancelled.
+
+    Returns:
+        List of (mapping_file_name, error message or None) in job order.
+    """
+
+    def report(done_count: int):
+        if progress:
+            progress(done_count / len(jobs), f"{done_count} of {len(jobs)} mapping files created")
+
+    if (len(jobs) <= 1 or workers == 1):
+        results = []
+        for job in jobs:
+            if (cancel_event is not None and cancel_event.is_set()):
+                results.append((job[0], "Cancelled"))
+                continue
+            results.append(create_mapping_file_job(job))
+            report(len(results))
+        return(results)
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        futures = [executor.submit(create_mapping_file_job, job) for job in jobs]
+        for done_count, future in enumerate(as_completed(futures), 1):
+            report(done_count)
+            if (cancel_event is not None and cancel_event.is_set()):
+                for pending in futures:
+                    pending.cancel()
+                break
+    return([future.result() if not future.cancelled() else (job[0], "Cancelled") for job, future in zip(jobs, futures)])
+
+###############################
+# Build Validation Index
+###############################
+def build_validation_index(models_submodels: dict, model_groups: dict = None):
+    # Hash sets of the model (and model group) names and "model/subModel" names of the current layout;
+    # mapping files saved from xLights can use model groups as targets and sources
+    with profiler.stage("validation_index_build") as stage:
+        models = set(models_submodels).union(model_groups or ())
+        submodels = {model + "/" + submodel for model, model_info in models_submodels.items()
+                     for submodel in model_info.get("submodels", [])}
+        stage["items"] = len(models) + len(submodels)
+    return((models, submodels))
+
+# Validation index of the mapping file workers (set by init_validation_index)
+validation_index = (set(), set())
+
+###############################
+# Init Validation Index
+###############################
+def init_validation_index(index: tuple):
+    # Worker initializer, so a process pool receives the index once per worker instead of once per file
+    global validation_index
+    validation_index = index
+
+###############################
+# Validate Mapping File
+###############################
+def validate_mapping_file(mapping_file_name: str, index: tuple = None):
+    """
+    Streams an .xmap file and checks every target model, target subModel and source against the layout.
+
+    Args:
+        mapping_file_name: The mapping file.
+        index: (models and model groups, "model/subModel" names) from build_validation_index, default the workers' index.
+
+    Returns:
+        Dictionary of the mapping file, its row count, the sorted missing targets, target subModels
+        ("model/subModel") and sources, and an error message (or None) if the file could not be read.
+    """
+
+    models, submodels = index if (index is not None) else validation_index
+    result = {"mapping_file": mapping_file_name, "rows": 0, "missing_targets": [], "missing_submodels": [],
+              "missing_sources": [], "error": None}
+    targets = set()
+    target_submodels = set()
+    sources = set()
+    try:
+        with open(mapping_file_name, 'r') as f:
+            f.readline()
+            count = int(f.readline())
+            for i in range(count):
+                targets.add(f.readline().rstrip("\n"))
+            rows = 0
+            for line in f:
+                fields = line.rstrip("\n").split("\t", 4)
+                if (len(fields) < 4):
+                    continue
+                rows += 1
+                targets.add(fields[0])
+                if fields[1]:
+                    target_submodels.add((fields[0], fields[1]))
+                if fields[3]:
+                    sources.add(fields[3])
+        result["rows"] = rows
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        result["error"] = str(e)
+        return(result)
+    # Only the distinct names are looked up (subModels of a missing target are not reported again)
+    missing_targets = targets - models
+    result["missing_targets"] = sorted(missing_targets)
+    result["missing_submodels"] = sorted(target + "/" + submodel for target, submodel in target_submodels
+                                         if target not in missing_targets and target + "/" + submodel not in submodels)
+    result["missing_sources"] = sorted(sources - models - submodels)
+    return(result)
+
+###############################
+# Validate Mapping Files
+###############################
+def validate_mapping_files(mapping_files: list, index: tuple, workers: int = None, use_processes: bool = False,
+                           progress=None, cancel_event=None):
+    # Validate mapping files in parallel, returning validate_mapping_file results in mapping_files order
+    with profiler.stage("mapping_validate") as stage:
+        stage["items"] = len(mapping_files)
+        if (len(mapping_files) <= 1 or workers == 1):
+            results = []
+            for mapping_file_name in mapping_files:
+                if (cancel_event is not None and cancel_event.is_set()):
+                    raise TaskCancelled()
+                results.append(validate_mapping_file(mapping_file_name, index))
+                if progress:
+                    progress(len(results) / len(mapping_files), f"{len(results)} of {len(mapping_files)} mapping files validated")
+            return(results)
+        if use_processes:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_validation_index, initargs=(index,))
+            job_index = None
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            job_index = index
+        with executor:
+            futures = [executor.submit(validate_mapping_file, mapping_file_name, job_index) for mapping_file_name in mapping_files]
+            for done_count, future in enumerate(as_completed(futures), 1):
+                if (cancel_event is not None and cancel_event.is_set()):
+                    for pending in futures:
+                        pending.cancel()
+                    raise TaskCancelled()
+                if progress:
+                    progress(done_count / len(mapping_files), f"{done_count} of {len(mapping_files)} mapping files validated")
+        return([future.result() for future in futures])
+
+###############################
+# Find Mapping Files
+###############################
+def find_mapping_files(show_folder: str):
+    # The .xmap files in the show folder
+    try:
+        return([show_folder + "/" + file_name for file_name in sorted(os.listdir(show_folder)) if file_name.lower().endswith(".xmap")])
+    except OSError as e:
+        logging.error(f"Unable to list {show_folder}: {e}")
+        return([])
+
+###############################
+# Validation Report
+###############################
+def validation_report(results: list, max_lines: int = None):
+    # The mapping files with dangling references (or read errors), then a summary line;
+    # with max_lines only the first max_lines problem lines are listed
+    report = []
+    invalid = 0
+    for result in results:
+        problems = []
+        if result["error"]:
+            problems.append(f"  Error: {result['error']}")
+        for key, label in (("missing_targets", "Missing Target Model"), ("missing_submodels", "Missing Target SubModel"),
+                           ("missing_sources", "Missing Source")):
+            problems.extend([f"  {label}: {name}" for name in result[key]])
+        if problems:
+            invalid += 1
+            report.append(result["mapping_file"])
+            report.extend(problems)
+    if (max_lines is not None and len(report) > max_lines):
+        report = report[:max_lines] + [f"... {len(report) - max_lines} more line(s) in the log"]
+    report.append(f"{len(results)} Mapping File(s) validated, {invalid} with missing models or subModels...")
+    return("\n".join(report))
+
+###############################
+# Mapping Report
+###############################
+def mapping_report(results: list, unmatched: list = None, max_lines: int = None, action: str = "created"):
+    # Aggregated result of generate_mapping_files, with the primary models that had no mapping models;
+    # at most max_lines file names (and primary models) are listed per heading, action names what was done
+    def listed(lines: list):
+        if (max_lines is not None and len(lines) > max_lines):
+            return(lines[:max_lines] + [f"... {len(lines) - max_lines} more"])
+        return(lines)
+    created = [mapping_file_name for mapping_file_name, error in results if error is None]
+    failed = [(mapping_file_name, error) for mapping_file_name, error in results if error is not None]
+    report = [f"{len(created)} Mapping File(s) {action}..."]
+    report.extend(listed(created))
+    if failed:
+        report.append(f"{len(failed)} Mapping File(s) failed...")
+        report.extend(listed([f"{mapping_file_name}: {error}" for mapping_file_name, error in failed]))
+    if unmatched:
+        report.append(f"{len(unmatched)} Primary Model(s) without Matching Mapping Models...")
+        report.extend(listed(unmatched))
+    return("\n".join(report))
+
+###############################
+# Virtual Model List
+###############################
+class VirtualModelList:
+    # A ttk.Treeview that only holds the visible page of rows. The full (filtered)
+    # row list is kept in Python and rows are copied into a fixed set of Treeview
+    # items as the list scrolls, so opening and scrolling large shows stays fast.
+    # A type-ahead filter matches all of its words against the model name and description.
+
+    def __init__(self, parent, rows: list, columns: list, selectmode: str = 'extended', height: int = 20):
+        """
+        Builds the filter entry, Treeview and scrollbar in parent.
+
+        Args:
+            parent: The frame to grid the widgets in.
+            rows: List of row values, the model name first and the description second.
+            columns: List of (heading, width, anchor) for each value in a row.
+            selectmode: The Treeview selectmode, 'browse' or 'extended'.
+            height: Number of visible rows.
+        """
+
+        self.selectmode = selectmode
+        self.height = height
+        self.offset = 0
+        self.selected = set()
+        self.filter_text = ""
+        self.page = []
+        self.rendering = False
+
+        # Filter Entry
+        filter_label = tk.Label(parent, text="Filter:", justify=tk.RIGHT)
+        filter_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        self.filter_var = tk.StringVar()
+        filter_entry = tk.Entry(parent, textvariable=self.filter_var, width=50, justify=tk.LEFT)
+        filter_entry.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        self.count_var = tk.StringVar()
+        count_label = tk.Label(parent, textvariable=self.count_var, justify=tk.RIGHT)
+        count_label.grid(row=0, column=2, padx=5, pady=5, sticky="e")
+
+        # Define Columns and Headings
+        columnslist = []
+        for i in range(1, len(columns) + 1):
+            columnslist.append("C" + str(i))
+        # Add a Treeview with one item per visible row
+        self.treev_tree = ttk.Treeview(parent, selectmode=selectmode, column=columnslist, show='headings', height=height)
+        self.treev_tree.column("# 0", width = 0, stretch = "no") # Hidden
+        self.treev_tree.heading("# 0", text = "")
+        for column, (heading, width, anchor) in zip(columnslist, columns):
+            self.treev_tree.column(column, width = width, anchor=anchor)
+            self.treev_tree.heading(column, text = heading)
+        self.treev_tree.grid(row=1, column=0, columnspan=3, sticky = "nsew")
+        # Add Vertical Scrollbar driven by the row offset
+        self.vscrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.vscrollbar.grid(row=1, column=3, sticky = 'nsew')
+
+        # Bindings
+        self.filter_var.trace_add("write", lambda *args: self.apply_filter(self.filter_var.get()))
+        self.treev_tree.bind("<<TreeviewSelect>>", self.sync_selection)
+        self.treev_tree.bind("<ButtonPress-1>", self.on_click)
+        self.treev_tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        self.treev_tree.bind("<Button-4>", lambda event: self.scroll(-1, "units"))
+        self.treev_tree.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        self.treev_tree.bind("<Prior>", lambda event: self.scroll(-1, "pages"))
+        self.treev_tree.bind("<Next>", lambda event: self.scroll(1, "pages"))
+        self.treev_tree.bind("<Up>", lambda event: self.on_arrow(-1))
+        self.treev_tree.bind("<Down>", lambda event: self.on_arrow(1))
+
+        self.set_rows(rows)
+
+    def set_rows(self, rows: list):
+        # Replace all rows and rebuild the search index
+        with profiler.stage("treeview_populate") as stage:
+            self.rows = list(rows)
+            self.row_keys = {values[0] for values in rows}
+            self.search_index = [self.search_text(values) for values in rows]
+            self.selected &= self.row_keys
+            self.filtered = None
+            self.apply_filter(self.filter_text)
+            stage["items"] = len(rows)
+
+    def search_text(self, values):
+        return((str(values[0]) + "\0" + str(values[1])).lower())
+
+    def find_row(self, model):
+        # Position of model in the sorted rows (or where it would be inserted)
+        return(bisect.bisect_left(self.rows, (model,)))
+
+    def filtered_models(self):
+        # Model names of the rows that pass the filter, in row order
+        return([self.rows[row][0] for row in self.filtered])
+
+    def model_at(self, y: int):
+        # Model name of the visible row at y, or None
+        item = self.treev_tree.identify_row(y)
+        if not item:
+            return None
+        return(self.rows[self.page[int(item)]][0])
+
+    def update_rows(self, removed_models: list, rows: list):
+        # Remove rows and add or replace rows in place, keeping the sort order, selection and scroll position
+        with profiler.stage("treeview_update") as stage:
+            for model in removed_models:
+                i = self.find_row(model)
+                if (i < len(self.rows) and self.rows[i][0] == model):
+                    del self.rows[i]
+                    del self.search_index[i]
+                    self.row_keys.discard(model)
+                    self.selected.discard(model)
+            for values in rows:
+                values = tuple(values)
+                i = self.find_row(values[0])
+                if (i < len(self.rows) and self.rows[i][0] == values[0]):
+                    self.rows[i] = values
+                    self.search_index[i] = self.search_text(values)
+                else:
+                    self.rows.insert(i, values)
+                    self.search_index.insert(i, self.search_text(values))
+                    self.row_keys.add(values[0])
+            self.filtered = None
+            self.apply_filter(self.filter_text, keep_offset=True)
+            stage["items"] = len(removed_models) + len(rows)
+
+    def apply_filter(self, text: str, keep_offset: bool = False):
+        # Filter rows on every word in text, narrowing the previous result when text was extended
+        text = text.strip().lower()
+        words = text.split()
+        if not words:
+            filtered = list(range(len(self.rows)))
+        else:
+            if (self.filtered is not None and self.filter_text and text.startswith(self.filter_text)):
+                candidates = self.filtered
+            else:
+                candidates = range(len(self.rows))
+            search_index = self.search_index
+            filtered = [i for i in candidates if all(word in search_index[i] for word in words)]
+        self.filter_text = text
+        self.filtered = filtered
+        if not keep_offset:
+            self.offset = 0
+        self.count_var.set(f"{len(filtered)} of {len(self.rows)} models")
+        self.render()
+
+    def render(self):
+        # Copy the visible page of filtered rows into the Treeview items
+        max_offset = max(0, len(self.filtered) - self.height)
+        self.offset = min(max(0, self.offset), max_offset)
+        page = self.filtered[self.offset:self.offset + self.height]
+        self.page = page
+        items = self.treev_tree.get_children()
+        for slot in range(len(page), len(items)):
+            self.treev_tree.delete(str(slot))
+        selected_items = []
+        for slot, row in enumerate(page):
+            item = str(slot)
+            values = self.rows[row]
+            if (slot < len(items)):
+                self.treev_tree.item(item, values=values)
+            else:
+                self.treev_tree.insert('', tk.END, iid=item, values=values)
+            if values[0] in self.selected:
+                selected_items.append(item)
+        self.rendering = True
+        self.treev_tree.selection_set(selected_items)
+        self.rendering = False
+        # Update Scrollbar
+        if self.filtered:
+            first = self.offset / len(self.filtered)
+            last = min(1.0, (self.offset + self.height) / len(self.filtered))
+        else:
+            first, last = 0.0, 1.0
+        self.vscrollbar.set(first, last)
+
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", count, "units"/"pages")
+        if (args[0] == "moveto"):
+            self.offset = int(float(args[1]) * len(self.filtered))
+            self.render()
+        elif (args[0] == "scroll"):
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, count: int, what: str):
+        step = self.height if (what == "pages") else 1
+        self.offset += count * step
+        self.render()
+        return("break")
+
+    def on_arrow(self, direction: int):
+        # Scroll when moving past the first or last visible row
+        focus = self.treev_tree.focus()
+        items = self.treev_tree.get_children()
+        if (not focus or not items):
+            return None
+        if ((direction < 0 and focus == items[0] and self.offset > 0) or
+            (direction > 0 and focus == items[-1] and self.offset + self.height < len(self.filtered))):
+            self.selected = {self.rows[self.filtered[self.offset + int(focus) + direction]][0]}
+            self.scroll(direction, "units")
+            return("break")
+        return None
+
+    def on_click(self, event):
+        # A plain click replaces the selection, including rows scrolled out of view
+        if not (event.state & 0x0005):
+            self.selected.clear()
+        return None
+
+    def sync_selection(self, event=None):
+        # Mirror the selection of the visible rows into the selected model set
+        if self.rendering:
+            return
+        selected_items = set(self.treev_tree.selection())
+        if (self.selectmode == 'browse' and selected_items):
+            self.selected.clear()
+        for slot, row in enumerate(self.page):
+            model = self.rows[row][0]
+            if str(slot) in selected_items:
+                self.selected.add(model)
+            else:
+                self.selected.discard(model)
+
+    def selected_models(self):
+        # Selected model names in row order
+        return([values[0] for values in self.rows if values[0] in self.selected])
+
+    def select_models(self, models: list):
+        # Add models to the selection
+        self.selected.update(model for model in models if model in self.row_keys)
+        self.render()
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.render()
 
 ###############################
 # Map Select Button
 ###############################
-def map_select_button(map_win, treev_top, primary_model: str, models_submodels: list):
-    # Get Selected Item(s)
-    mapping_models = []
-    selected_items = treev_top.selection()
-    for item in selected_items:
-        logging.debug(f"Selected Item: {item}")
-        values = treev_top.item(item, 'values')
-        logging.debug(f"values: {values}")
-        mapping_model = values[0]
-        # Remove Selection on Item
-        treev_top.selection_remove(item)
-        # Select Mapping Models
-        mapping_models.append(mapping_model) 
+def map_select_button(map_win, model_list, primary_model: str, models_submodels: dict, merge: bool = False, on_mapped=None):
+    # Get Selected Model(s)
+    mapping_models = model_list.selected_models()
+    logging.debug("mapping_models: %s", mapping_models)
+    # Remove Selection
+    model_list.clear_selection()
     if mapping_models:
-        # Create Mapping File
-        mapping_file_name = show_folder + "/" + primary_model + "_mapping_" + str(dt.date.today()).replace('-', '_') + ".xmap"
+        # Mapped: move on to the next queued primary model (on_mapped), else close the window
+        done = on_mapped if (on_mapped is not None) else map_win.destroy
         model_info = models_submodels.get(primary_model)
+        # Removed from the layout (reloaded) since the window opened?
+        if model_info is None:
+            logging.warning(f"Primary Model {primary_model} no longer exists, not mapped")
+            msgbox("Info:", f"Primary Model {primary_model} no longer exists, not mapped...")
+            done()
+            return
+        mapping_file_name = mapping_file_path(show_folder, primary_model, merge)
         submodels = model_info.get("submodels", [])
-        create_mapping_file(mapping_file_name, primary_model, submodels, mapping_models)
-        map_win.destroy()
+        jobs = [(mapping_file_name, primary_model, submodels, mapping_models, merge)]
+
+        def on_done(results):
+            logging.info("Mapping:\n%s", mapping_report(results))
+            msgbox("Info:", mapping_report(results, max_lines=30))
+            done()
+
+        run_background_task(map_win, "Creating Mapping Files",
+                            lambda progress, cancel_event: generate_mapping_files(jobs, progress=progress, cancel_event=cancel_event),
+                            on_done)
     else:
         logging.info(f"No Mapping Models Selected...")
         msgbox("Info:", f"No Mapping Models Selected...")
     return
 
+###############################
+# Primary Models Text
+###############################
+def primary_models_text(primary_models: list):
+    # The primary model being mapped (and how many are queued after it)
+    text = primary_models[0]
+    if (len(primary_models) > 1):
+        text += f" (+{len(primary_models) - 1} more queued)"
+    return(text)
+
 ###############################
 # Select Mapping Models Window
 ###############################
-def select_mapping_models_window(pri_win, primary_model: str, models_submodels: dict):
+def select_mapping_models_window(pri_win, primary_models: list, models_submodels: dict, reload_listeners: list = None,
+                                 suggested_models: dict = None, merge: bool = False):
+    # The primary models are mapped one at a time, in order: each starts with its own suggested models
+    # (suggested_models: primary model -> models) selected and is mapped only to the models selected for it
+    primary_models = list(primary_models)
+    suggested_models = suggested_models or {}
     # Define Toplevel
     map_win = tk.Toplevel(pri_win)
     map_win.title('Select Mapping Models')
     # Set Window Width and Height
     w = 830 # width for map_win
-    h = 640 # height for map_win
+    h = 680 # height for map_win
     # Calculate Window Cordinates
     (x, y) = calcxycoord(map_win, "east", w, h)
     map_win.geometry('%dx%d+%d+%d' % (w, h, x, y))
@@ -233,50 +1811,80 @@ def select_mapping_models_window(pri_win, primary_model: str, models_submodels:
 
     # Primary Model Variable
     primary_model_var = tk.StringVar()
-    primary_model_var.set(primary_model)
+    primary_model_var.set(primary_models_text(primary_models))
     primary_model_label = tk.Label(pri_frame, textvariable=primary_model_var, justify=tk.LEFT)
     primary_model_label.grid(row=0, column=1, padx=10, pady=10, sticky="w")
 
-    # Define Columns and Headings
-    columnslist = []
-    for i in range(1, 3):
-        columnslist.append("C" + str(i))
-    # Add a Top Treeview
-    treev_tree = ttk.Treeview(top_frame, selectmode='extended', column=columnslist, show='headings', height=20)
-    treev_tree.column("# 0", width = 0, stretch = "no") # Hidden
-    treev_tree.heading("# 0", text = "")
-    treev_tree.column("C1", width = 400, anchor='w')
-    treev_tree.heading("C1", text = "Model")
-    treev_tree.column("C2", width = 400, anchor='w')
-    treev_tree.heading("C2", text = "Description")
-    treev_tree.grid(row=0, column=0, sticky = "nsew")
-    # Add Vertical Scrollbar
-    treev_tree_vscrollbar = ttk.Scrollbar(top_frame, orient=tk.VERTICAL, command=treev_tree.yview)
-    treev_tree.configure(yscroll=treev_tree_vscrollbar.set)
-    treev_tree_vscrollbar.grid(row=1, column=3, sticky = 'nsew')
+    # Build Models List (every model but the primary model being mapped)
+    def models_values_list():
+        values_list = [(model, model_info.get("description", "")) for model, model_info in models_submodels.items()
+                       if model != primary_models[0]]
+        values_list.sort()
+        logging.debug(f"Mapping models list: {len(values_list)} models")
+        return(values_list)
+    # Add a Virtual Model List
+    model_list = VirtualModelList(top_frame, models_values_list(), [("Model", 400, 'w'), ("Description", 400, 'w')],
+                                  selectmode='extended', height=20)
+    ctrl_key_var = tk.StringVar()
 
-    # Build Models List
-    models_values_list = []
-    for model, model_info in models_submodels.items():
-        logging.info(f"model: {model}")
-        if (model != primary_model):
-            description = model_info.get("description", "")
-            logging.info(f"description: {description}")
-            models_values_list.append([model, description])
-    models_values_list.sort()
-    for model_values in models_values_list:
-        treev_tree.insert('', tk.END, values=model_values)
+    # Show the Primary Model being mapped with its Suggested Models preselected
+    def show_primary_model(new_rows: bool = True):
+        primary_model_var.set(primary_models_text(primary_models))
+        if new_rows:
+            model_list.set_rows(models_values_list())
+        model_list.clear_selection()
+        model_list.select_models(suggested_models.get(primary_models[0], []))
+        ctrl_key_text = "Hold down the CTRL key to select multiple models"
+        if suggested_models.get(primary_models[0]):
+            ctrl_key_text = f"{len(model_list.selected_models())} suggested models are selected. " + ctrl_key_text
+        ctrl_key_var.set(ctrl_key_text)
+    show_primary_model(new_rows=False)
+
+    # Next Queued Primary Model, closing the window after the last one
+    def next_primary_model():
+        primary_models.pop(0)
+        if not primary_models:
+            map_win.destroy()
+            return
+        show_primary_model()
+
+    # Apply Reloaded Model Changes; primary models removed from the layout are no longer mapped
+    def refresh_rows(diff: dict, affected_families: set):
+        removed_primary_models = [model for model in diff["removed"] if model in primary_models]
+        if removed_primary_models:
+            current_removed = primary_models[0] in removed_primary_models
+            primary_models[:] = [model for model in primary_models if model not in removed_primary_models]
+            if not primary_models:
+                msgbox("Info:", f"Primary Model(s) {', '.join(removed_primary_models)} removed from the layout...")
+                map_win.destroy()
+                return
+            msgbox("Info:", f"Primary Model(s) {', '.join(removed_primary_models)} removed from the layout, not mapped...")
+            if current_removed:
+                show_primary_model()
+                return
+            primary_model_var.set(primary_models_text(primary_models))
+        rows = [(model, models_submodels[model].get("description", "")) for model in diff["added"] + diff["changed"]
+                if model != primary_models[0]]
+        model_list.update_rows(diff["removed"], rows)
+    if (reload_listeners is not None):
+        reload_listeners.append(refresh_rows)
+        map_win.bind("<Destroy>", lambda event: reload_listeners.remove(refresh_rows)
+                     if (event.widget is map_win and refresh_rows in reload_listeners) else None)
 
     # Primary Button
-    primary_button = tk.Button(buttons_frame, text="Map Selected", command=lambda: map_select_button(map_win, treev_tree, primary_model, models_submodels))
+    primary_button = tk.Button(buttons_frame, text="Map Selected", command=lambda: map_select_button(map_win, model_list, primary_models[0], models_submodels, merge, next_primary_model))
     primary_button.config( width = 15 )
     primary_button.grid(row=0, column=0, padx=10, pady=10, sticky="e")
+    # Skip Button: next queued primary model without mapping this one
+    skip_button = tk.Button(buttons_frame, text="Skip", command=next_primary_model)
+    skip_button.config( width = 15 )
+    skip_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
     # Close Button
     close_button = tk.Button(buttons_frame, text="Close", command=map_win.destroy)
     close_button.config( width = 15 )
-    close_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+    close_button.grid(row=0, column=2, padx=10, pady=10, sticky="e")
     # 
-    ctrl_key_label = tk.Label(ctrl_key_frame, text="Hold down the CTRL key to select multiple models", justify=tk.CENTER)
+    ctrl_key_label = tk.Label(ctrl_key_frame, textvariable=ctrl_key_var, justify=tk.CENTER)
     ctrl_key_label.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
     
 
@@ -288,53 +1896,550 @@ def remove_trailing_chars(text: str):
     result = text.rstrip('-0123456789')
     return result
 
+###############################
+# Build Family Index
+###############################
+def build_family_index(models_submodels: dict):
+    # Map each model name with its trailing "-0123456789" removed to its family members (in layout order)
+    with profiler.stage("index_build") as stage:
+        family_index = {}
+        for model in models_submodels:
+            family_index.setdefault(remove_trailing_chars(model), []).append(model)
+        stage["items"] = len(family_index)
+    return(family_index)
+
+###############################
+# Get Family Mapping Models
+###############################
+def get_family_mapping_models(family_index: dict, primary_model: str):
+    # Models in the primary model's name family, excluding the primary model
+    members = family_index.get(remove_trailing_chars(primary_model), [])
+    return([model for model in members if model != primary_model])
+
+###############################
+# Get Family Size
+###############################
+def get_family_size(family_index: dict, model: str):
+    # Number of models the model would map to by name
+    return(len(family_index.get(remove_trailing_chars(model), [])) - 1)
+
+###############################
+# Build Fingerprint Index
+###############################
+def build_fingerprint_index(models_submodels: dict):
+    # Map each subModel fingerprint to the models (in layout order) with identical subModels;
+    # models without subModels are left out so they never match each other
+    with profiler.stage("fingerprint_index_build") as stage:
+        fingerprint_index = {}
+        for model, model_info in models_submodels.items():
+            fingerprint = model_info.get("fingerprint", "")
+            if fingerprint:
+                fingerprint_index.setdefault(fingerprint, []).append(model)
+        stage["items"] = len(fingerprint_index)
+    return(fingerprint_index)
+
+###############################
+# Get Structure Mapping Models
+###############################
+def get_structure_mapping_models(fingerprint_index: dict, models_submodels: dict, primary_model: str):
+    # Models with the same subModel structure as the primary model, excluding the primary model
+    fingerprint = models_submodels[primary_model].get("fingerprint", "")
+    members = fingerprint_index.get(fingerprint, []) if fingerprint else []
+    return([model for model in members if model != primary_model])
+
+###############################
+# Get Mapping Models
+###############################
+def get_mapping_models(models_submodels: dict, family_index: dict, fingerprint_index: dict, primary_model: str,
+                       match_name: bool = True, match_structure: bool = False):
+    # Name family, subModel structure, or name family with structurally incompatible targets dropped
+    if (match_name and match_structure):
+        fingerprint = models_submodels[primary_model].get("fingerprint", "")
+        return([model for model in get_family_mapping_models(family_index, primary_model)
+                if models_submodels[model].get("fingerprint", "") == fingerprint])
+    if match_structure:
+        return(get_structure_mapping_models(fingerprint_index, models_submodels, primary_model))
+    return(get_family_mapping_models(family_index, primary_model))
+
+###############################
+# Name Search Index
+###############################
+class NameSearchIndex:
+    # Trigram index of the model names, built once per load. Names are compared on their letters
+    # only (digits, "-", "_" and spaces split words), so "Arch-1", "Arch Left 1" and "Arch_L2" are
+    # close and the models of a numbered family share one indexed name. A query only visits the
+    # names sharing a trigram with the primary model and ranks their models by Dice similarity of
+    # the name, blended with the description when both models have one.
+
+    def __init__(self, models_submodels: dict = None):
+        # trigram -> names, name -> models and model -> (name, description) with names and
+        # descriptions in their letters-only form
+        self.postings = {}
+        self.names = {}
+        self.model_keys = {}
+        # Trigram sets of the names and descriptions in use
+        self.grams = {}
+        self.gram_users = collections.Counter()
+        with profiler.stage("name_index_build") as stage:
+            for model, model_info in (models_submodels or {}).items():
+                self.add(model, model_info.get("description", ""))
+            stage["items"] = len(self.names)
+
+    @staticmethod
+    def letters_key(text: str):
+        # Lower case words of letters, e.g. "Arch_L2" -> "arch l"
+        return(" ".join("".join(char if char.isalpha() else " " for char in text.lower()).split()))
+
+    @staticmethod
+    def trigrams(key: str):
+        # Trigrams of each word, padded with a space at both ends
+        return(frozenset(f" {word} "[i:i + 3] for word in key.split() for i in range(len(word))))
+
+    def use_grams(self, key: str):
+        if (key not in self.grams):
+            self.grams[key] = self.trigrams(key)
+        self.gram_users[key] += 1
+        return(self.grams[key])
+
+    def release_grams(self, key: str):
+        self.gram_users[key] -= 1
+        if (self.gram_users[key] <= 0):
+            del self.gram_users[key]
+            del self.grams[key]
+
+    def add(self, model: str, description: str):
+        name = self.letters_key(model)
+        description = self.letters_key(description)
+        self.model_keys[model] = (name, description)
+        self.use_grams(description)
+        if (name not in self.names):
+            self.names[name] = set()
+            for gram in self.use_grams(name):
+                self.postings.setdefault(gram, set()).add(name)
+        self.names[name].add(model)
+
+    def remove(self, model: str, description: str = ""):
+        if (model not in self.model_keys):
+            return
+        name, description = self.model_keys.pop(model)
+        self.release_grams(description)
+        members = self.names[name]
+        members.discard(model)
+        if not members:
+            del self.names[name]
+            for gram in self.grams[name]:
+                names = self.postings[gram]
+                names.discard(name)
+                if not names:
+                    del self.postings[gram]
+            self.release_grams(name)
+
+    def suggest(self, model: str, description: str = "", count: int = SUGGESTION_COUNT, min_score: float = SUGGESTION_MIN_SCORE,
+                allowed_models: set = None):
+        # Up to count (model, score) pairs most like model, best first, excluding model itself
+        # (and, when allowed_models is given, any model not in it)
+        grams = self.trigrams(self.letters_key(model))
+        if not grams:
+            return([])
+        description_grams = self.trigrams(self.letters_key(description))
+        # Lowest name similarity that can still reach min_score (with a perfect description match)
+        threshold = min_score * (1 + DESCRIPTION_WEIGHT) - DESCRIPTION_WEIGHT if description_grams else min_score
+        threshold = max(threshold, 0.01)
+        # Skip the postings of the most common trigrams while a name sharing only those could not
+        # reach threshold; candidates come from the rarer trigrams and are checked against the rest
+        grams = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())), reverse=True)
+        common = 0
+        while (common < len(grams) - 1 and 2 * (common + 1) / (len(grams) + common + 1) < threshold):
+            common += 1
+        common_postings = [self.postings.get(gram, set()) for gram in grams[:common]]
+        counts = collections.Counter()
+        for gram in grams[common:]:
+            counts.update(self.postings.get(gram, ()))
+        # Dice = 2 * overlap / (query + candidate) and candidate >= overlap, so overlap >= threshold * query / (2 - threshold)
+        min_overlap = threshold * len(grams) / (2 - threshold) - common
+        description_scores = {}
+        scores = []
+        for name, overlap in counts.items():
+            if (overlap < min_overlap):
+                continue
+            size = len(grams) + len(self.grams[name])
+            if common_postings:
+                if (2 * (overlap + common) < threshold * size):
+                    continue
+                overlap += sum(1 for names in common_postings if name in names)
+            name_score = 2 * overlap / size
+            if (name_score < threshold):
+                continue
+            for candidate in self.names[name]:
+                if (candidate == model or (allowed_models is not None and candidate not in allowed_models)):
+                    continue
+                score = name_score
+                candidate_description = self.model_keys[candidate][1]
+                if (description_grams and candidate_description):
+                    if (candidate_description not in description_scores):
+                        candidate_grams = self.grams[candidate_description]
+                        description_scores[candidate_description] = (2 * len(description_grams & candidate_grams) /
+                                                                      (len(description_grams) + len(candidate_grams)))
+                    score = (name_score + DESCRIPTION_WEIGHT * description_scores[candidate_description]) / (1 + DESCRIPTION_WEIGHT)
+                if (score >= min_score):
+                    scores.append((-score, candidate))
+        return([(candidate, round(-score, 3)) for score, candidate in heapq.nsmallest(count, scores)])
+
+###############################
+# Get Suggested Mapping Models
+###############################
+def get_suggested_mapping_models(name_index: NameSearchIndex, models_submodels: dict, primary_model: str, used_models: set = None):
+    # Best name (and description) matches of the primary model, best first, optionally only among used_models
+    description = models_submodels[primary_model].get("description", "")
+    return([model for model, score in name_index.suggest(primary_model, description, allowed_models=used_models)])
+
+###############################
+# Model Group Index
+###############################
+class ModelGroupIndex:
+    # The modelGroups of a show with memoized expansion of (nested) groups into their member models.
+    # A group is only walked once per load: its expansion is cached and re-used by every group that
+    # contains it. Groups that (indirectly) contain themselves are expanded without looping.
+
+    def __init__(self, model_groups: dict = None, models_submodels: dict = None):
+        """
+        Args:
+            model_groups: Dictionary of group name to its member names, as filled by load_models_submodels.
+            models_submodels: The loaded models; members that are not models or groups (e.g. "model/subModel") are skipped.
+        """
+
+        self.models_submodels = models_submodels if models_submodels is not None else {}
+        self.expanded = {}
+        self.update(model_groups or {})
+
+    def update(self, model_groups: dict):
+        # Replace the groups (e.g. after a reload) and drop the cached expansions
+        self.model_groups = model_groups
+        self.expanded = {}
+
+    def groups(self):
+        return(sorted(self.model_groups))
+
+    def expand(self, group: str):
+        # Member models of group with nested groups expanded, in group order without duplicates
+        if group not in self.model_groups:
+            raise KeyError(f"Unknown model group: {group}")
+        models = self.expanded.get(group)
+        if models is None:
+            models, low = self.expand_members(group, {})
+        return(models)
+
+    def expand_members(self, group: str, stack: dict):
+        # Depth first expansion; stack holds the depth of the groups being expanded. An expansion that
+        # reached a group further up the stack (a cycle) is incomplete and is only cached for the first
+        # group of the cycle, whose expansion holds every model of the cycle.
+        depth = len(stack)
+        stack[group] = depth
+        low = depth
+        members = {}
+        for member in self.model_groups[group]:
+            if member in self.model_groups:
+                if member in stack:
+                    logging.debug("Model group cycle: %s contains %s", group, member)
+                    low = min(low, stack[member])
+                    continue
+                models = self.expanded.get(member)
+                if models is None:
+                    models, member_low = self.expand_members(member, stack)
+                    low = min(low, member_low)
+                members.update(dict.fromkeys(models))
+            elif member in self.models_submodels:
+                members[member] = None
+        del stack[group]
+        models = tuple(members)
+        if (low >= depth):
+            self.expanded[group] = models
+        return(models, low)
+
+###############################
+# Diff Models Submodel(s)
+###############################
+def diff_models_submodels(old_models_submodels: dict, new_models_submodels: dict):
+    # Added, removed and changed (description or subModels) model names between two loads
+    added = [model for model in new_models_submodels if model not in old_models_submodels]
+    removed = [model for model in old_models_submodels if model not in new_models_submodels]
+    changed = [model for model, model_info in new_models_submodels.items()
+               if model in old_models_submodels and old_models_submodels[model] != model_info]
+    return({"added": added, "removed": removed, "changed": changed})
+
+###############################
+# Get Changed Models
+###############################
+def get_changed_models(old_models_submodels: dict, new_models_submodels: dict):
+    # Models whose mapping rows can differ between two loads: added, removed, or with a different subModel
+    # fingerprint (the hash of their subModel names, order and node ranges). Descriptions are never written
+    # to a mapping file, so a model whose only change is its description is not included.
+    changed_models = old_models_submodels.keys() ^ new_models_submodels.keys()
+    changed_models.update(model for model, model_info in new_models_submodels.items()
+                          if model in old_models_submodels and old_models_submodels[model].fingerprint != model_info.fingerprint)
+    return(changed_models)
+
+###############################
+# Apply Models Diff
+###############################
+def apply_models_diff(models_submodels: dict, family_index: dict, new_models_submodels: dict, diff: dict,
+                      fingerprint_index: dict = None, name_index: NameSearchIndex = None):
+    # Update models_submodels and the family, fingerprint and search indexes in place, returning the affected family names
+    affected_families = set()
+    if (name_index is not None):
+        for model in diff["removed"] + diff["changed"]:
+            name_index.remove(model, models_submodels[model].get("description", ""))
+        for model in diff["added"] + diff["changed"]:
+            name_index.add(model, new_models_submodels[model].get("description", ""))
+    if (fingerprint_index is not None):
+        for model in diff["removed"] + diff["changed"]:
+            fingerprint = models_submodels[model].get("fingerprint", "")
+            members = fingerprint_index.get(fingerprint, [])
+            if model in members:
+                members.remove(model)
+            if (fingerprint and not members):
+                fingerprint_index.pop(fingerprint, None)
+        for model in diff["added"] + diff["changed"]:
+            fingerprint = new_models_submodels[model].get("fingerprint", "")
+            if fingerprint:
+                fingerprint_index.setdefault(fingerprint, []).append(model)
+    for model in diff["removed"]:
+        del models_submodels[model]
+        family = remove_trailing_chars(model)
+        members = family_index.get(family, [])
+        if model in members:
+            members.remove(model)
+        if not members:
+            family_index.pop(family, None)
+        affected_families.add(family)
+    for model in diff["added"]:
+        models_submodels[model] = new_models_submodels[model]
+        family = remove_trailing_chars(model)
+        family_index.setdefault(family, []).append(model)
+        affected_families.add(family)
+    for model in diff["changed"]:
+        models_submodels[model] = new_models_submodels[model]
+    return(affected_families)
+
+###############################
+# File Signature
+###############################
+def file_signature(file_name: str):
+    # (size, mtime) of the file, or None while it is missing (e.g. during a save)
+    try:
+        stat = os.stat(file_name)
+        return((stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        return None
+
+###############################
+# Watch RGB Effects
+###############################
+def watch_rgbeffects(window, rgbeffects_file: str, models_submodels: dict, family_index: dict, fingerprint_index: dict,
+                     name_index: NameSearchIndex, group_index: ModelGroupIndex, on_diff):
+    # Poll xlights_rgbeffects.xml while window exists. When it changes (and has stopped changing
+    # for one interval) it is re-loaded on a worker thread, diffed against models_submodels and only
+    # the differences are applied; on_diff(diff, affected_families) is then called on the Tk thread.
+    # The model groups are replaced on every reload, as their expansions depend on the models.
+    results_queue = queue.Queue()
+    state = {"signature": file_signature(rgbeffects_file), "pending": None, "reloading": False}
+
+    def reload():
+        try:
+            new_model_groups = {}
+            new_models_submodels = load_models_submodels(rgbeffects_file, use_models_cache, model_groups=new_model_groups)
+            results_queue.put((diff_models_submodels(models_submodels, new_models_submodels), new_models_submodels, new_model_groups))
+        except Exception as e:
+            logging.error(f"Reload of {rgbeffects_file} failed: {e}")
+            results_queue.put((None, None, None))
+
+    def poll():
+        if not window.winfo_exists():
+            return
+        try:
+            diff, new_models_submodels, new_model_groups = results_queue.get_nowait()
+            state["reloading"] = False
+            if (diff is not None):
+                groups_changed = (new_model_groups != group_index.model_groups)
+                affected_families = set()
+                if (diff["added"] or diff["removed"] or diff["changed"]):
+                    affected_families = apply_models_diff(models_submodels, family_index, new_models_submodels, diff,
+                                                          fingerprint_index, name_index)
+                    logging.info(f"Reloaded {rgbeffects_file}: {len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+                elif not groups_changed:
+                    diff = None
+                group_index.update(new_model_groups)
+                if (diff is not None):
+                    on_diff(diff, affected_families)
+        except queue.Empty:
+            pass
+        if not state["reloading"]:
+            signature = file_signature(rgbeffects_file)
+            if (signature is not None and signature != state["signature"]):
+                if (signature == state["pending"]):
+                    state["signature"] = signature
+                    state["pending"] = None
+                    state["reloading"] = True
+                    threading.Thread(target=reload, name="Reload Show", daemon=True).start()
+                else:
+                    state["pending"] = signature
+        window.after(WATCH_INTERVAL_MS, poll)
+
+    window.after(WATCH_INTERVAL_MS, poll)
+
 ########################
 # Primary Select Button
 ########################
-def primary_select_button(pri_win, treev_tree, models_submodels: dict, match_model_name_var: bool):
-    # Get Selected Item(s)
-    selected_items = treev_tree.selection()
-    for item in selected_items:
-        logging.debug(f"Selected Item: {item}")
-        values = treev_tree.item(item, 'values')
-        logging.debug(f"values: {values}")
-        primary_model = values[0]
-        # Remove Selection on Item
-        treev_tree.selection_remove(item)
+def primary_select_button(pri_win, model_list, models_submodels: dict, family_index: dict, fingerprint_index: dict,
+                          name_index: NameSearchIndex, group_index: ModelGroupIndex, match_model_name_var: bool,
+                          match_structure_var: bool, used_models_var: bool, merge_var: bool, model_group_var: str,
+                          group_use_var: str, reload_listeners: list = None):
+    # Get Selected Model(s)
+    primary_models = model_list.selected_models()
+    # Remove Selection
+    model_list.clear_selection()
+    match_name = match_model_name_var.get()
+    match_structure = match_structure_var.get()
+    merge = merge_var.get()
+    # Model Group as the Primary Models or the Mapping Targets?
+    target_models = None
+    model_group = model_group_var.get()
+    if model_group:
+        group_models = list(group_index.expand(model_group))
+        if not group_models:
+            msgbox("Info:", f"No Models in Model Group {model_group}")
+            return
+        if (group_use_var.get() == GROUP_USE_PRIMARY):
+            primary_models = list(dict.fromkeys(primary_models + group_models))
+        else:
+            target_models = group_models
+    if not primary_models:
+        return
+
+    def map_models(used_models: set = None):
+        map_primary_models(pri_win, primary_models, models_submodels, family_index, fingerprint_index, name_index,
+                           match_name, match_structure, used_models, merge, reload_listeners, target_models)
+
+    # Only Models Used in Sequences? Scan the sequences (only the changed ones are re-read) first
+    if used_models_var.get():
+        run_background_task(pri_win, "Scanning Sequences",
+                            lambda progress, cancel_event: get_used_models(scan_sequences(show_folder, use_cache=use_models_cache,
+                                                                                          progress=progress, cancel_event=cancel_event),
+                                                                           group_index),
+                            map_models)
+    else:
+        map_models()
+
+########################
+# Map Primary Models
+########################
+def map_primary_models(pri_win, primary_models: list, models_submodels: dict, family_index: dict, fingerprint_index: dict,
+                       name_index: NameSearchIndex, match_name: bool, match_structure: bool, used_models: set = None,
+                       merge: bool = False, reload_listeners: list = None, target_models: list = None):
+    # Map each primary model by name and/or structure, or to target_models (an expanded model group)
+    # when given, as one job with one summary; otherwise open one Select Mapping Models window that
+    # queues the primary models, each mapped to the models selected for it.
+    # When used_models is given only models used by the show folder sequences are mapped to, and
+    # with merge the rows are merged into the primary model's existing mapping file.
+    if (target_models is None and not match_name and not match_structure):
+        # Select Mapping Models per primary model, each starting with its own suggested models selected
+        suggested_models = {primary_model: get_suggested_mapping_models(name_index, models_submodels, primary_model, used_models)
+                            for primary_model in primary_models}
+        logging.debug("suggested_models: %s", suggested_models)
+        select_mapping_models_window(pri_win, primary_models, models_submodels, reload_listeners, suggested_models, merge)
+        return
+    jobs = []
+    unmatched = []
+    for primary_model in primary_models:
+        logging.debug("primary_model: %s", primary_model)
         # Get Primary Model subModels
         model_info = models_submodels.get(primary_model)
         submodels = model_info.get("submodels", "")
-        # Match by Model Name?
-        if match_model_name_var.get():
-            # Remove Trailing Numbers & "-"
-            check_primary_model = remove_trailing_chars(primary_model)
-            mapping_models = []
-            for mapping_model, mapping_model_info in models_submodels.items():
-                check_mapping_model = remove_trailing_chars(mapping_model)
-                if (check_primary_model == check_mapping_model and primary_model != mapping_model):
-                    logging.debug(f'mapping_model: {mapping_model}')
-                    mapping_models.append(mapping_model)
-            if mapping_models:
-                # Create Mapping File
-                mapping_file_name = show_folder + "/" + primary_model + "_mapping_" + str(dt.date.today()).replace('-', '_') + ".xmap"
-                create_mapping_file(mapping_file_name, primary_model, submodels, mapping_models)
-            else:
-                logging.info(f"No Matching Mapping Models Selected...")
-                msgbox("Info:", f"No Matching Mapping Models Selected...")
+        # Map to a Model Group, or Match by Model Name and/or SubModel Structure?
+        if (target_models is not None):
+            mapping_models = [model for model in target_models if model != primary_model]
+        else:
+            # Name Family (trailing numbers & "-" removed) and/or SubModel Fingerprint Lookup
+            mapping_models = get_mapping_models(models_submodels, family_index, fingerprint_index, primary_model,
+                                                match_name, match_structure)
+        if (used_models is not None):
+            mapping_models = [model for model in mapping_models if model in used_models]
+        logging.debug("mapping_models: %s", mapping_models)
+        if mapping_models:
+            # Create Mapping File
+            mapping_file_name = mapping_file_path(show_folder, primary_model, merge)
+            jobs.append((mapping_file_name, primary_model, submodels, mapping_models, merge))
         else:
-            # Select Mapping Models 
-            select_mapping_models_window(pri_win, primary_model, models_submodels)
+            logging.info("No Matching Mapping Models for %s", primary_model)
+            unmatched.append(primary_model)
+    if jobs:
+        # Create Mapping File(s) in the background, reporting every primary model in one summary
+        def on_done(results):
+            logging.info("Mapping:\n%s", mapping_report(results, unmatched))
+            msgbox("Info:", mapping_report(results, unmatched, max_lines=30))
+
+        run_background_task(pri_win, "Creating Mapping Files",
+                            lambda progress, cancel_event: generate_mapping_files(jobs, progress=progress, cancel_event=cancel_event),
+                            on_done)
+    else:
+        logging.info(f"No Matching Mapping Models Selected...")
+        msgbox("Info:", f"No Matching Mapping Models Selected...")
+
+###############################
+# Select Families Button
+###############################
+def select_families_button(model_list, family_index: dict):
+    # Select the first (filtered) model of every name family with more than one model as a primary model
+    filtered_models = set(model_list.filtered_models())
+    primary_models = []
+    for members in family_index.values():
+        if (len(members) > 1):
+            filtered_members = [model for model in members if model in filtered_models]
+            if filtered_members:
+                primary_models.append(min(filtered_members))
+    model_list.select_models(primary_models)
+
+###############################
+# Model Details Button
+###############################
+def model_details_button(pri_win, rgbeffects_file: str, model: str):
+    # Show the subModels (with node ranges) of one model, parsed on demand from its byte span in the show file
+    if model is None:
+        return
+    run_background_task(pri_win, "Reading Model",
+                        lambda progress, cancel_event: parse_model(rgbeffects_file, model, use_models_cache, progress, cancel_event),
+                        lambda details: msgbox("Info:", model_details_report(details, max_lines=40)))
+
+###############################
+# Validate Select Button
+###############################
+def validate_select_button(pri_win, models_submodels: dict, group_index: ModelGroupIndex):
+    # Validate every mapping file in the show folder against the loaded models and model groups in the background
+    mapping_files = find_mapping_files(show_folder)
+    if not mapping_files:
+        msgbox("Info:", f"No Mapping Files found in {show_folder}")
+        return
+    index = build_validation_index(models_submodels, group_index.model_groups)
+
+    def on_done(results):
+        logging.info("Validation:\n%s", validation_report(results))
+        msgbox("Info:", validation_report(results, max_lines=30))
+
+    run_background_task(pri_win, "Validating Mapping Files",
+                        lambda progress, cancel_event: validate_mapping_files(mapping_files, index, progress=progress, cancel_event=cancel_event),
+                        on_done)
 
 ###############################
 # Select Primary Model Window
 ###############################
-def select_primary_model_window(parent, rgbeffects_file: str, models_submodels: dict):
+def select_primary_model_window(parent, rgbeffects_file: str, models_submodels: dict, family_index: dict, fingerprint_index: dict,
+                                name_index: NameSearchIndex, group_index: ModelGroupIndex):
     # Define Toplevel
     pri_win = tk.Toplevel(parent)
     pri_win.title('Select Primary Model')
     # Set Window Width and Height
     w = 830 # width for pri_win
-    h = 650 # height for pri_win
+    h = 790 # height for pri_win
     # Calculate Window Cordinates
     (x, y) = calcxycoord(pri_win, "center", w, h)
     pri_win.geometry('%dx%d+%d+%d' % (w, h, x, y))
@@ -367,44 +2472,87 @@ def select_primary_model_window(parent, rgbeffects_file: str, models_submodels:
     match_model_name_var = tk.BooleanVar()
     match_model_name = tk.Checkbutton(top_frame, text="Match by Model Name", variable=match_model_name_var)
     match_model_name.grid(row=1, column=1, padx=10, pady=10, sticky="w")
-    
-    # Define Columns and Headings
-    columnslist = []
-    for i in range(1, 3):
-        columnslist.append("C" + str(i))
-    # Add a Top Treeview
-    treev_tree = ttk.Treeview(tree_frame, selectmode='browse', column=columnslist, show='headings', height=20)
-    treev_tree.column("# 0", width = 0, stretch = "no") # Hidden
-    treev_tree.heading("# 0", text = "")
-    treev_tree.column("C1", width = 400, anchor='w')
-    treev_tree.heading("C1", text = "Model")
-    treev_tree.column("C2", width = 400, anchor='w')
-    treev_tree.heading("C2", text = "Description")
-    treev_tree.grid(row=0, column=0, sticky = "nsew")
-    # Add Vertical Scrollbar
-    treev_tree_vscrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=treev_tree.yview)
-    treev_tree.configure(yscroll=treev_tree_vscrollbar.set)
-    treev_tree_vscrollbar.grid(row=0, column=3, sticky = 'nsew')
 
+    # Create Match SubModel Structure CheckBox
+    match_structure_var = tk.BooleanVar()
+    match_structure = tk.Checkbutton(top_frame, text="Match by SubModel Structure", variable=match_structure_var)
+    match_structure.grid(row=1, column=2, padx=10, pady=10, sticky="w")
+
+    # Create Only Models Used in Sequences CheckBox
+    used_models_var = tk.BooleanVar()
+    used_models = tk.Checkbutton(top_frame, text="Only Models Used in Sequences", variable=used_models_var)
+    used_models.grid(row=2, column=1, padx=10, pady=10, sticky="w")
+
+    # Create Merge into Existing Mapping File CheckBox
+    merge_var = tk.BooleanVar()
+    merge = tk.Checkbutton(top_frame, text="Merge into Existing Mapping File", variable=merge_var)
+    merge.grid(row=2, column=2, padx=10, pady=10, sticky="w")
+
+    # Create Model Group ComboBox (blank = no group) and what the group is used as
+    model_group_label = tk.Label(top_frame, text="Model Group", justify=tk.RIGHT)
+    model_group_label.grid(row=3, column=0, padx=10, pady=10, sticky="e")
+    model_group_var = tk.StringVar()
+    model_group = ttk.Combobox(top_frame, textvariable=model_group_var, values=[""] + group_index.groups(), state="readonly", width=40)
+    model_group.grid(row=3, column=1, padx=10, pady=10, sticky="w")
+    group_use_var = tk.StringVar()
+    group_use_var.set(GROUP_USE_TARGETS)
+    group_use = ttk.Combobox(top_frame, textvariable=group_use_var, values=[GROUP_USE_TARGETS, GROUP_USE_PRIMARY], state="readonly", width=25)
+    group_use.grid(row=3, column=2, padx=10, pady=10, sticky="w")
+    
     # Build Models List
-    models_values_list = []
-    for model, model_info in models_submodels.items():
-        logging.debug(f"model: {model}")
-        description = model_info.get("description", "")
-        logging.debug(f"description: {description}")
-        models_values_list.append([model, description])
+    models_values_list = [(model, model_info.get("description", ""), get_family_size(family_index, model))
+                          for model, model_info in models_submodels.items()]
     models_values_list.sort()
-    for model_values in models_values_list:
-        treev_tree.insert('', tk.END, values=model_values)
+    logging.debug(f"Primary models list: {len(models_values_list)} models")
+    # Add a Virtual Model List
+    model_list = VirtualModelList(tree_frame, models_values_list,
+                                  [("Model", 350, 'w'), ("Description", 350, 'w'), ("Name Matches", 100, 'e')],
+                                  selectmode='extended', height=20)
+    # Double Click a Model to see its SubModels
+    model_list.treev_tree.bind("<Double-1>", lambda event: model_details_button(pri_win, rgbeffects_file, model_list.model_at(event.y)))
+
+    # Reload Status Variable
+    reload_status_var = tk.StringVar()
+    reload_status_label = tk.Label(top_frame, textvariable=reload_status_var, justify=tk.LEFT)
+    reload_status_label.grid(row=1, column=0, padx=10, pady=10, sticky="w")
+
+    # Apply Reloaded Model Changes: changed models plus every member of an affected name family
+    def refresh_rows(diff: dict, affected_families: set):
+        models = set(diff["added"]) | set(diff["changed"])
+        for family in affected_families:
+            models.update(family_index.get(family, []))
+        rows = [(model, models_submodels[model].get("description", ""), get_family_size(family_index, model)) for model in models]
+        model_list.update_rows(diff["removed"], rows)
+        model_group["values"] = [""] + group_index.groups()
+        if (model_group_var.get() not in group_index.model_groups):
+            model_group_var.set("")
+        reload_status_var.set(f"Reloaded {dt.datetime.now():%H:%M:%S}: {len(diff['added'])} added, "
+                              f"{len(diff['removed'])} removed, {len(diff['changed'])} changed")
+    reload_listeners = [refresh_rows]
+    watch_rgbeffects(pri_win, rgbeffects_file, models_submodels, family_index, fingerprint_index, name_index, group_index,
+                     lambda diff, affected_families: [listener(diff, affected_families) for listener in list(reload_listeners)])
 
     # Primary Button
-    primary_button = tk.Button(buttons_frame, text="Primary Selected", command=lambda: primary_select_button(pri_win, treev_tree, models_submodels, match_model_name_var))
+    primary_button = tk.Button(buttons_frame, text="Primary Selected", command=lambda: primary_select_button(pri_win, model_list, models_submodels, family_index, fingerprint_index, name_index,
+                                                                                                        group_index, match_model_name_var, match_structure_var, used_models_var,
+                                                                                                        merge_var, model_group_var, group_use_var, reload_listeners))
     primary_button.config( width = 15 )
     primary_button.grid(row=0, column=0, padx=10, pady=10, sticky="e")
+    # Select Families Button
+    families_button = tk.Button(buttons_frame, text="Select Families", command=lambda: select_families_button(model_list, family_index))
+    families_button.config( width = 15 )
+    families_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+    # Validate Button
+    validate_button = tk.Button(buttons_frame, text="Validate Mappings", command=lambda: validate_select_button(pri_win, models_submodels, group_index))
+    validate_button.config( width = 15 )
+    validate_button.grid(row=0, column=2, padx=10, pady=10, sticky="e")
     # Close Button
     close_button = tk.Button(buttons_frame, text="Close", command=pri_win.destroy)
     close_button.config( width = 15 )
-    close_button.grid(row=0, column=1, padx=10, pady=10, sticky="e")
+    close_button.grid(row=0, column=3, padx=10, pady=10, sticky="e")
+    # Extended Selection Hint
+    ctrl_key_label = tk.Label(buttons_frame, text="Hold down the CTRL or SHIFT key to select multiple primary models", justify=tk.CENTER)
+    ctrl_key_label.grid(row=1, column=0, columnspan=4, padx=10, pady=5, sticky="nsew")
 
     pri_win.mainloop()
     return()
@@ -420,26 +2568,44 @@ def do_root_select_button(root, show_folder_entry):
     logging.debug(f"show_folder: {show_folder}")
     # Verify xLights RGB Effects XML File Exists
     if os.path.isfile(rgbeffects_file):
-        # Get Models subModel Dictionary from xlights rgbeffects_xml file
-        models_submodels = get_models_submodels(rgbeffects_file)
-        if (models_submodels is not None):
+        # Get Models subModel Dictionary from the cache or xlights rgbeffects_xml file on a worker thread
+        model_groups = {}
+        run_background_task(root, "Loading Show",
+                            lambda progress, cancel_event: load_models_submodels(rgbeffects_file, use_models_cache, progress, cancel_event,
+                                                                                 model_groups),
+                            lambda models_submodels: show_loaded(root, rgbeffects_file, models_submodels, model_groups))
+    else:
+        logging.error(f"xLights RGB Effects XML File {rgbeffects_file} not found")
+        msgbox("Error:", f"xLights RGB Effects XML File {rgbeffects_file} not found")
+        rgbeffects_file = None
+
+#############################
+# Show Loaded
+#############################
+def show_loaded(root, rgbeffects_file: str, models_submodels: dict, model_groups: dict = None):
+    if (models_submodels is not None):
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
             for model, model_info in models_submodels.items():
                 description = model_info.get("description", "")
                 logging.debug("*" * 50)
-                logging.debug(f"model: {model} {description}")
+                logging.debug("model: %s %s", model, description)
                 logging.debug("*" * 50)
                 submodels = model_info.get("submodels", [])
                 for submodel in submodels:
-                    logging.debug(f"+++ {submodel}")
-            # Select Primary Model
-            select_primary_model_window(root, rgbeffects_file, models_submodels)
-        else:
-            logging.error(f"No Models found in xLights RGB Effects Xml File {rgbeffects_file}")
-            msgbox("Error:", f"No Models found in xLights RGB Effects XML File {rgbeffects_file}")
+                    logging.debug("+++ %s", submodel)
+        # Build Name Family Index once per load
+        family_index = build_family_index(models_submodels)
+        # Build SubModel Fingerprint Index once per load
+        fingerprint_index = build_fingerprint_index(models_submodels)
+        # Build Name Search Index once per load
+        name_index = NameSearchIndex(models_submodels)
+        # Model Group Index (expanded on demand)
+        group_index = ModelGroupIndex(model_groups, models_submodels)
+        # Select Primary Model
+        select_primary_model_window(root, rgbeffects_file, models_submodels, family_index, fingerprint_index, name_index, group_index)
     else:
-        logging.error(f"xLights RGB Effects XML File {rgbeffects_file} not found")
-        msgbox("Error:", f"xLights RGB Effects XML File {rgbeffects_file} not found")
-        rgbeffects_file = None
+        logging.error(f"No Models found in xLights RGB Effects Xml File {rgbeffects_file}")
+        msgbox("Error:", f"No Models found in xLights RGB Effects XML File {rgbeffects_file}")
 
 ##################################
 # Show Folder Window
@@ -448,6 +2614,9 @@ def show_folder_window(show_folder):
     # 
     rgbeffects_file = None
 
+    # Import tkinter
+    import_gui()
+
     # Define Root Window
     root = tk.Tk()
 
@@ -491,6 +2660,462 @@ def show_folder_window(show_folder):
     root.mainloop()
     return()
 
+###############################
+# Build Show Folder Jobs
+###############################
+def build_show_folder_jobs(show_folder: str, primary_models: list = None, match: str = "name", used_models_only: bool = False,
+                           workers: int = None, use_processes: bool = False, merge: bool = False, primary_group: str = None,
+                           target_group: str = None, regenerate_from: str = None):
+    # Mapping jobs for every name family or subModel structure (or only the given primary models and/or the
+    # members of primary_group) in a show folder, mapping to the members of target_group when given and
+    # optionally only to the models its sequences use. With regenerate_from (an older xlights_rgbeffects.xml,
+    # or the folder of one) the existing mapping files whose primary model or targets changed since it are
+    # regenerated instead (see build_regenerate_jobs).
+    show_folder = show_folder.replace("\\", "/")
+    summary = {"show_folder": show_folder, "models": 0, "families": 0, "groups": 0, "jobs": [], "models_mapped": 0,
+               "unmatched": [], "missing": [], "sequences": None, "unused_targets": 0, "changed_models": None,
+               "unchanged": 0, "orphaned": [], "skipped": [], "error": None}
+    rgbeffects_file = show_folder + "/" + "xlights_rgbeffects.xml"
+    if not os.path.isfile(rgbeffects_file):
+        summary["error"] = f"xLights RGB Effects XML File {rgbeffects_file} not found"
+        logging.error(summary["error"])
+        return(summary)
+    model_groups = {}
+    models_submodels = load_models_submodels(rgbeffects_file, use_models_cache, model_groups=model_groups)
+    if not models_submodels:
+        summary["error"] = f"No Models found in xLights RGB Effects XML File {rgbeffects_file}"
+        logging.error(summary["error"])
+        return(summary)
+    # Model Groups: each group is expanded once and shared by the primary/target sets and the used models
+    group_index = ModelGroupIndex(model_groups, models_submodels)
+    summary["groups"] = len(model_groups)
+    for group in (primary_group, target_group):
+        if (group and group not in model_groups):
+            summary["error"] = f"Model Group {group} not found in {rgbeffects_file}"
+            logging.error(summary["error"])
+            return(summary)
+
+    # Older Layout: parsed without the cache (it is usually an xLights backup) and compared by subModel fingerprint
+    if regenerate_from:
+        old_rgbeffects_file = regenerate_from.replace("\\", "/")
+        if os.path.isdir(old_rgbeffects_file):
+            old_rgbeffects_file = old_rgbeffects_file + "/" + "xlights_rgbeffects.xml"
+        if not os.path.isfile(old_rgbeffects_file):
+            summary["error"] = f"xLights RGB Effects XML File {old_rgbeffects_file} not found"
+            logging.error(summary["error"])
+            return(summary)
+        old_model_groups = {}
+        old_models_submodels = load_models_submodels(old_rgbeffects_file, False, model_groups=old_model_groups)
+        changed_models = get_changed_models(old_models_submodels, models_submodels)
+        summary["changed_models"] = len(changed_models)
+
+    # Group Models by Name Family and SubModel Structure
+    families = build_family_index(models_submodels)
+    fingerprint_index = build_fingerprint_index(models_submodels)
+    match_name = match in ("name", "both")
+    match_structure = match in ("structure", "both")
+    summary["models"] = len(models_submodels)
+    summary["families"] = len(families) if match_name else len(fingerprint_index)
+
+    # Primary Models: the given models, else the first model (by name) of each family (or structure)
+    primary_selected = bool(primary_models or primary_group)
+    if primary_models:
+        missing_models = [model for model in primary_models if model not in models_submodels]
+        for model in missing_models:
+            logging.error(f"Primary Model {model} not found in {rgbeffects_file}")
+        primary_models = [model for model in primary_models if model in models_submodels]
+    elif primary_group:
+        missing_models = []
+        primary_models = []
+    else:
+        missing_models = []
+        primary_models = [min(members) for members in (families if match_name else fingerprint_index).values()]
+    if primary_group:
+        primary_models = list(dict.fromkeys(primary_models + list(group_index.expand(primary_group))))
+    target_models = group_index.expand(target_group) if target_group else None
+
+    summary["missing"] = missing_models
+    if regenerate_from:
+        return(build_regenerate_jobs(summary, show_folder, models_submodels, model_groups, changed_models,
+                                     primary_models if primary_selected else None))
+
+    # Models Used by the Show Folder Sequences
+    used_models = None
+    if used_models_only:
+        sequences = scan_sequences(show_folder, workers, use_processes, use_models_cache)
+        used_models = get_used_models(sequences, group_index)
+        summary["sequences"] = len(sequences)
+
+    for primary_model in sorted(primary_models):
+        if (target_models is not None):
+            mapping_models = [model for model in target_models if model != primary_model]
+        else:
+            mapping_models = get_mapping_models(models_submodels, families, fingerprint_index, primary_model, match_name, match_structure)
+        if (used_models is not None):
+            summary["unused_targets"] += len(mapping_models)
+            mapping_models = [model for model in mapping_models if model in used_models]
+            summary["unused_targets"] -= len(mapping_models)
+        if not mapping_models:
+            logging.debug("No Matching Mapping Models for %s", primary_model)
+            summary["unmatched"].append(primary_model)
+            continue
+        submodels = models_submodels[primary_model].get("submodels", [])
+        mapping_file_name = mapping_file_path(show_folder, primary_model, merge)
+        summary["jobs"].append((mapping_file_name, primary_model, submodels, mapping_models, merge))
+        summary["models_mapped"] += len(mapping_models)
+    return(summary)
+
+###############################
+# Build Regenerate Jobs
+###############################
+def build_regenerate_jobs(summary: dict, show_folder: str, models_submodels: dict, model_groups: dict, changed_models: set,
+                          primary_models: list = None):
+    # Jobs regenerating the <primary>_mapping_YYYY_MM_DD.xmap files of a show folder (optionally only those of
+    # primary_models) whose primary model or one of whose listed targets is in changed_models. Each file keeps its own
+    # target list: target models get new rows, model group targets keep their rows and targets that no longer exist
+    # are dropped. Files with rows not written by create_mapping_file (e.g. edited in xLights) are skipped, files of
+    # removed primary models are reported as orphaned, and no mapping file is ever created.
+    for mapping_file_name in find_mapping_files(show_folder):
+        primary_model = mapping_file_primary_model(mapping_file_name)
+        if (primary_model is None):
+            continue
+        if (primary_models is not None and primary_model not in primary_models):
+            continue
+        try:
+            with open(mapping_file_name, 'r') as f:
+                mapping_file_text = f.read()
+            mapping_file = MappingFile.read(mapping_file_name)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            logging.warning(f"Unable to read Mapping File {mapping_file_name}: {e}")
+            summary["skipped"].append(mapping_file_name)
+            continue
+        if (primary_model not in changed_models and changed_models.isdisjoint(mapping_file.targets)):
+            summary["unchanged"] += 1
+            continue
+        if (primary_model not in models_submodels):
+            summary["orphaned"].append(mapping_file_name)
+            continue
+        if not mapping_file.generated_from(primary_model):
+            logging.warning(f"Mapping File {mapping_file_name} has rows not mapped from {primary_model}, not regenerated")
+            summary["skipped"].append(mapping_file_name)
+            continue
+        mapping_models = [target for target in mapping_file.targets if target in models_submodels and target != primary_model]
+        kept_targets = [target for target in mapping_file.targets if target not in models_submodels and target in model_groups]
+        dropped_targets = [target for target in mapping_file.targets
+                           if target not in models_submodels and target not in model_groups]
+        if dropped_targets:
+            logging.info(f"Mapping File {mapping_file_name}: dropping removed targets {', '.join(dropped_targets)}")
+        if not mapping_models:
+            logging.debug("No Mapping Models left in %s", mapping_file_name)
+            summary["unmatched"].append(primary_model)
+            continue
+        submodels = models_submodels[primary_model].get("submodels", [])
+        # A change to the targets' subModels alone leaves the rows as they are
+        if (mapping_file.regenerate(primary_model, submodels, mapping_models, kept_targets).text() == mapping_file_text):
+            summary["unchanged"] += 1
+            continue
+        summary["jobs"].append((mapping_file_name, primary_model, submodels, mapping_models, False, kept_targets))
+        summary["models_mapped"] += len(mapping_models)
+    return(summary)
+
+###############################
+# Batch Map Show Folders
+###############################
+def batch_map_show_folders(show_folders: list, primary_models: list = None, workers: int = None, use_processes: bool = False,
+                           match: str = "name", used_models_only: bool = False, merge: bool = False, primary_group: str = None,
+                           target_group: str = None, regenerate_from: str = None):
+    # Map every name family of every show folder without the GUI in a single worker pool
+    start_time = time.perf_counter()
+    summaries = [build_show_folder_jobs(show_folder, primary_models, match, used_models_only, workers, use_processes, merge,
+                                        primary_group, target_group, regenerate_from)
+                 for show_folder in show_folders]
+    jobs = [job for summary in summaries for job in summary["jobs"]]
+    results = generate_mapping_files(jobs, workers, use_processes)
+
+    # Summary
+    exit_code = 0
+    for summary in summaries:
+        print(f"Show Folder:           {summary['show_folder']}")
+        if summary["error"]:
+            print(f"Error:                 {summary['error']}")
+            exit_code = 1
+            continue
+        print(f"Models:                {summary['models']}")
+        print(f"Model Groupings:       {summary['families']} ({match})")
+        print(f"Model Groups:          {summary['groups']}")
+        print(f"Mapping Files:         {len(summary['jobs'])}")
+        print(f"Models Mapped:         {summary['models_mapped']}")
+        print(f"Unmatched Primaries:   {len(summary['unmatched'])}")
+        if (summary["sequences"] is not None):
+            print(f"Sequences Scanned:     {summary['sequences']}")
+            print(f"Unused Targets:        {summary['unused_targets']}")
+        if (summary["changed_models"] is not None):
+            print(f"Changed Models:        {summary['changed_models']}")
+            print(f"Unchanged Mappings:    {summary['unchanged']}")
+            for mapping_file_name in summary["orphaned"]:
+                print(f"Orphaned Mapping File: {mapping_file_name}")
+            for mapping_file_name in summary["skipped"]:
+                print(f"Skipped Mapping File:  {mapping_file_name}")
+        if summary["missing"]:
+            print(f"Primaries Not Found:   {', '.join(summary['missing'])}")
+            exit_code = 1
+    print(mapping_report(results, action="regenerated" if regenerate_from else "created"))
+    if any(error is not None for mapping_file_name, error in results):
+        exit_code = 1
+    print(f"Elapsed Seconds:       {time.perf_counter() - start_time:.3f}")
+    return(exit_code)
+
+###############################
+# Validate Show Folders
+###############################
+def validate_show_folders(show_folders: list, workers: int = None, use_processes: bool = False):
+    # Validate the mapping files of every show folder against its layout without the GUI
+    start_time = time.perf_counter()
+    exit_code = 0
+    for show_folder in show_folders:
+        show_folder = show_folder.replace("\\", "/")
+        rgbeffects_file = show_folder + "/" + "xlights_rgbeffects.xml"
+        print(f"Show Folder:           {show_folder}")
+        if not os.path.isfile(rgbeffects_file):
+            print(f"Error:                 xLights RGB Effects XML File {rgbeffects_file} not found")
+            exit_code = 1
+            continue
+        model_groups = {}
+        index = build_validation_index(load_models_submodels(rgbeffects_file, use_models_cache, model_groups=model_groups), model_groups)
+        results = validate_mapping_files(find_mapping_files(show_folder), index, workers, use_processes)
+        print(validation_report(results))
+        if any(result["error"] or result["missing_targets"] or result["missing_submodels"] or result["missing_sources"]
+               for result in results):
+            exit_code = 1
+    print(f"Elapsed Seconds:       {time.perf_counter() - start_time:.3f}")
+    return(exit_code)
+
+###############################
+# Show Service
+###############################
+class ShowService:
+    # A show folder kept loaded for --serve: models_submodels and its family and fingerprint
+    # indexes stay in memory and are only updated (by diff) when xlights_rgbeffects.xml changes.
+
+    def __init__(self, show_folder: str):
+        self.show_folder = show_folder.replace("\\", "/")
+        self.rgbeffects_file = self.show_folder + "/" + "xlights_rgbeffects.xml"
+        self.lock = threading.RLock()
+        self.signature = None
+        self.models_submodels = {}
+        self.family_index = {}
+        self.fingerprint_index = {}
+        self.name_index = NameSearchIndex()
+        self.group_index = ModelGroupIndex()
+        self.loaded_at = None
+        self.reloads = 0
+
+    def refresh(self):
+        # Load on first use and re-load (applying only the differences) when the file has changed
+        with self.lock:
+            signature = file_signature(self.rgbeffects_file)
+            if signature is None:
+                raise FileNotFoundError(f"xLights RGB Effects XML File {self.rgbeffects_file} not found")
+            if (signature == self.signature):
+                return
+            new_model_groups = {}
+            new_models_submodels = load_models_submodels(self.rgbeffects_file, use_models_cache, model_groups=new_model_groups)
+            if (self.signature is None):
+                self.models_submodels = new_models_submodels
+                self.family_index = build_family_index(new_models_submodels)
+                self.fingerprint_index = build_fingerprint_index(new_models_submodels)
+                self.name_index = NameSearchIndex(new_models_submodels)
+                self.group_index = ModelGroupIndex(new_model_groups, new_models_submodels)
+            else:
+                diff = diff_models_submodels(self.models_submodels, new_models_submodels)
+                apply_models_diff(self.models_submodels, self.family_index, new_models_submodels, diff,
+                                  self.fingerprint_index, self.name_index)
+                logging.info(f"Reloaded {self.rgbeffects_file}: {len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+                self.group_index.update(new_model_groups)
+                self.reloads += 1
+            self.signature = signature
+            self.loaded_at = dt.datetime.now().isoformat(timespec='seconds')
+
+    def status(self):
+        return({"show_folder": self.show_folder, "models": len(self.models_submodels), "name_families": len(self.family_index),
+                "structures": len(self.fingerprint_index), "groups": len(self.group_index.model_groups),
+                "loaded_at": self.loaded_at, "reloads": self.reloads})
+
+    def list_models(self):
+        return({"count": len(self.models_submodels),
+                "models": [{"name": model, "description": model_info.description, "submodels": len(model_info.submodels)}
+                           for model, model_info in self.models_submodels.items()]})
+
+    def model(self, model: str, details: bool = False):
+        # With details the model attributes and subModel node ranges are parsed from the model's span of the show file
+        model_info = self.get_model_info(model)
+        body = {"name": model, "description": model_info.description, "submodels": list(model_info.submodels),
+                "fingerprint": model_info.fingerprint}
+        if details:
+            body["details"] = parse_model(self.rgbeffects_file, model, use_models_cache)
+        return(body)
+
+    def family(self, model: str, match: str = "name"):
+        check_match(match)
+        self.get_model_info(model)
+        return({"model": model, "match": match,
+                "models": get_mapping_models(self.models_submodels, self.family_index, self.fingerprint_index, model,
+                                             match in ("name", "both"), match in ("structure", "both"))})
+
+    def list_groups(self):
+        return({"count": len(self.group_index.model_groups), "groups": self.group_index.groups()})
+
+    def group(self, group: str):
+        return({"name": group, "members": list(self.group_index.model_groups.get(group, ())),
+                "models": list(self.group_index.expand(group))})
+
+    def suggest(self, model: str, count: int = SUGGESTION_COUNT):
+        model_info = self.get_model_info(model)
+        return({"model": model, "suggestions": [{"name": candidate, "score": score} for candidate, score
+                                                in self.name_index.suggest(model, model_info.description, count)]})
+
+    def create_xmap(self, primary_model: str, mapping_models: list = None, match: str = "name", merge: bool = False,
+                    target_group: str = None):
+        # Create (or merge into the existing) mapping file of primary_model to mapping_models
+        # (default: the members of target_group, else its matching models)
+        check_match(match)
+        if (mapping_models is not None and
+            (not isinstance(mapping_models, list) or not all(isinstance(model, str) for model in mapping_models))):
+            raise ValueError("mapping_models must be a list of model names")
+        if (target_group is not None and not isinstance(target_group, str)):
+            raise ValueError("target_group must be a model group name")
+        if not isinstance(merge, bool):
+            raise ValueError("merge must be true or false")
+        model_info = self.get_model_info(primary_model)
+        if (mapping_models is None and target_group is not None):
+            mapping_models = [model for model in self.group_index.expand(target_group) if model != primary_model]
+        if mapping_models is None:
+            mapping_models = self.family(primary_model, match)["models"]
+        unknown_models = [model for model in mapping_models if model not in self.models_submodels]
+        if unknown_models:
+            raise KeyError(f"Unknown mapping model(s): {', '.join(unknown_models)}")
+        if not mapping_models:
+            raise ValueError(f"No Matching Mapping Models for {primary_model}")
+        mapping_file_name = mapping_file_path(self.show_folder, primary_model, merge)
+        create_mapping_file(mapping_file_name, primary_model, model_info.submodels, mapping_models, merge)
+        return({"mapping_file": mapping_file_name, "primary_model": primary_model, "mapping_models": mapping_models})
+
+    def get_model_info(self, model: str):
+        model_info = self.models_submodels.get(model)
+        if model_info is None:
+            raise KeyError(f"Unknown model: {model}")
+        return(model_info)
+
+###############################
+# Show Request Handler
+###############################
+class ShowRequestHandler(BaseHTTPRequestHandler):
+    # JSON API of a ShowService:
+    #   GET  /status                          GET /models
+    #   GET  /model?name=X[&details=1]        GET /family?model=X[&match=name|structure|both]
+    #   GET  /suggest?model=X[&count=N]           GET /groups
+    #   GET  /group?name=X
+    #   POST /xmap {"primary_model": X, "mapping_models": [...], "target_group": G, "match": "name", "merge": false}
+    #        (all but primary_model optional)
+    service = None
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+        routes = {
+            "/status": lambda: self.service.status(),
+            "/models": lambda: self.service.list_models(),
+            "/model": lambda: self.service.model(require(query, "name"), query.get("details", "0") not in ("0", "false", "")),
+            "/family": lambda: self.service.family(require(query, "model"), query.get("match", "name")),
+            "/suggest": lambda: self.service.suggest(require(query, "model"), int(query.get("count", SUGGESTION_COUNT))),
+            "/groups": lambda: self.service.list_groups(),
+            "/group": lambda: self.service.group(require(query, "name")),
+            }
+        self.handle_route(routes.get(url.path))
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+
+        def create_xmap():
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            return(self.service.create_xmap(require(request, "primary_model"), request.get("mapping_models"), request.get("match", "name"),
+                                            request.get("merge", False), request.get("target_group")))
+        self.handle_route(create_xmap if (url.path == "/xmap") else None)
+
+    def handle_route(self, route):
+        if route is None:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            # One request at a time against the loaded show, so a reload never changes it mid-request
+            with self.service.lock:
+                try:
+                    self.service.refresh()
+                except Exception as e:
+                    # Missing, half saved or malformed show file: the loaded show is kept and the next request retries
+                    logging.error(f"Unable to load {self.service.rgbeffects_file}: {e}")
+                    self.send_json(503, {"error": f"Unable to load {self.service.rgbeffects_file}: {e}"})
+                    return
+                body = route()
+            self.send_json(200, body)
+        except KeyError as e:
+            self.send_json(404, {"error": str(e).strip("'\"")})
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            logging.exception(f"Request {self.path} failed")
+            self.send_json(500, {"error": str(e)})
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+###############################
+# Require
+###############################
+def require(values: dict, key: str):
+    # Request parameter that must be present
+    if key not in values:
+        raise ValueError(f"Missing parameter: {key}")
+    return(values[key])
+
+###############################
+# Check Match
+###############################
+def check_match(match: str):
+    # Request match value that must be one of the batch --match choices
+    if (match not in MATCH_CHOICES):
+        raise ValueError(f"Invalid match: {match} (choices: {', '.join(MATCH_CHOICES)})")
+
+###############################
+# Serve Show Folder
+###############################
+def serve_show_folder(show_folder: str, host: str = "127.0.0.1", port: int = 8765):
+    # Keep the show loaded and answer JSON requests until interrupted
+    service = ShowService(show_folder)
+    service.refresh()
+    handler = type("BoundShowRequestHandler", (ShowRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    logging.info(f"Serving {service.rgbeffects_file} ({len(service.models_submodels)} models) on http://{host}:{server.server_port}")
+    print(f"Serving {service.show_folder} on http://{host}:{server.server_port} (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return(0)
+
 ###############################
 # main
 ###############################
@@ -502,36 +3127,143 @@ def main():
     ### Define Arguments
     cli_parser.add_argument('-l', '--logging_level', default = 30, type = int, choices = [0, 10, 20, 30, 40, 50], help = 'Logging Level',
         required = False)
+    cli_parser.add_argument('-n', '--no_cache', action = 'store_true', help = 'Do not use the show folder models cache',
+        required = False)
+    cli_parser.add_argument('-s', '--show_folder', action = 'append', default = None, help = 'xLights Show Folder (repeatable in batch mode)',
+        required = False)
+    cli_parser.add_argument('-b', '--batch', action = 'store_true', help = 'Map every model name family without the GUI (requires a show folder)',
+        required = False)
+    cli_parser.add_argument('-p', '--primary_model', action = 'append', default = None, help = 'Batch: map only this primary model (repeatable)',
+        required = False)
+    cli_parser.add_argument('-m', '--match', default = 'name', choices = list(MATCH_CHOICES),
+        help = 'Batch: match models by name family, subModel structure, or name family with the same subModel structure', required = False)
+    cli_parser.add_argument('-w', '--workers', default = None, type = int, help = 'Batch: number of mapping file workers',
+        required = False)
+    cli_parser.add_argument('--process_pool', action = 'store_true', help = 'Batch: use worker processes instead of threads',
+        required = False)
+    cli_parser.add_argument('-u', '--used_models', action = 'store_true',
+        help = 'Batch: map only to models that the .xsq sequences in the show folder use', required = False)
+    cli_parser.add_argument('--primary_group', default = None, metavar = 'GROUP',
+        help = 'Batch: map the member models of this model group (nested groups expanded) as primary models', required = False)
+    cli_parser.add_argument('--target_group', default = None, metavar = 'GROUP',
+        help = 'Batch: map each primary model to the member models of this model group instead of its matching models', required = False)
+    cli_parser.add_argument('--regenerate_from', default = None, metavar = 'OLD',
+        help = 'Batch: only regenerate the existing mapping files whose primary model or targets changed since the OLD xlights_rgbeffects.xml (or its folder)',
+        required = False)
+    cli_parser.add_argument('--merge', action = 'store_true',
+        help = "Batch: merge into each primary model's latest mapping file instead of writing a new one", required = False)
+    cli_parser.add_argument('--validate', action = 'store_true',
+        help = 'Check every .xmap in the show folder(s) for models and subModels missing from the layout (no GUI)', required = False)
+    cli_parser.add_argument('--serve', action = 'store_true', help = 'Keep the show folder loaded and answer JSON requests over HTTP',
+        required = False)
+    cli_parser.add_argument('--host', default = '127.0.0.1', help = 'Serve: host address to listen on',
+        required = False)
+    cli_parser.add_argument('--port', default = 8765, type = int, help = 'Serve: port to listen on',
+        required = False)
+    cli_parser.add_argument('--profile', nargs = '?', const = '-', default = None, metavar = 'JSON_FILE',
+        help = 'Print (or write to JSON_FILE) a JSON timing report of each stage', required = False)
+    cli_parser.add_argument('--profile_memory', action = 'store_true',
+        help = 'Add the peak traced memory of each stage to the --profile report (slows the stages down, so their times are not comparable)',
+        required = False)
+    cli_parser.add_argument('--cprofile', default = None, metavar = 'PSTATS_FILE', help = 'Write cProfile statistics of the run to PSTATS_FILE',
+        required = False)
 
     args = cli_parser.parse_args()
     
     logging_level = args.logging_level
+    global use_models_cache
+    use_models_cache = not args.no_cache
+
+    # Setup Logging (before anything is logged, so the log file handler is installed)
+    setup_logging(logging_level)
+
+    # Profiling
+    if (args.profile_memory and not args.profile):
+        args.profile = '-'
+    if args.profile:
+        profiler.enable(track_memory=args.profile_memory)
+    cprofiler = None
+    if args.cprofile:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
 
     os_name = platform.system()
-    logging.debug(f"Operating System: {os_name}")
-    show_folder = ""
+    logging.debug("Operating System: %s", os_name)
+    show_folders = args.show_folder or []
+    show_folder = show_folders[0] if show_folders else ""
     # Windows OS?
-    if (os_name == "Windows"):
-        # Read the Xlights LastDir from HKEY_CURRENT_USER
-        Xlights_last_dir = read_registry_value(winreg.HKEY_CURRENT_USER,
-                                               "Software\\Xlights\\",
-                                               "LastDir")
+    if (not show_folder and os_name == "Windows"):
+        with profiler.stage("registry_lookup"):
+            import winreg
+            # Read the Xlights LastDir from HKEY_CURRENT_USER
+            Xlights_last_dir = read_registry_value(winreg.HKEY_CURRENT_USER,
+                                                   "Software\\Xlights\\",
+                                                   "LastDir")
         if Xlights_last_dir:
-            logging.debug(f"Xlights_last_dir: {Xlights_last_dir}")
+            logging.debug("Xlights_last_dir: %s", Xlights_last_dir)
             show_folder = Xlights_last_dir
-
-    # Setup Logging
-    setup_logging(logging_level)
+            show_folders = [show_folder]
 
     logging.info("#" * 50)
     logging.info("#" * 5 + " Map Model/Submodels Begin")
     logging.info("#" * 50)
 
-    # Show Folder Window
-    show_folder_window(show_folder)
+    exit_code = 0
+    if args.serve:
+        if show_folder:
+            # Serve Show Folder
+            try:
+                exit_code = serve_show_folder(show_folder, args.host, args.port)
+            except OSError as e:
+                logging.error(f"Unable to serve {show_folder}: {e}")
+                exit_code = 1
+        else:
+            logging.error("Serve mode requires a show folder (-s/--show_folder)")
+            exit_code = 2
+    elif args.validate:
+        if show_folders:
+            # Validate Show Folder Mapping Files
+            exit_code = validate_show_folders(show_folders, args.workers, args.process_pool)
+        else:
+            logging.error("Validate mode requires a show folder (-s/--show_folder)")
+            exit_code = 2
+    elif (args.batch or args.regenerate_from):
+        if (args.regenerate_from and len(show_folders) > 1):
+            logging.error("Regenerate mode compares one show folder (-s/--show_folder) with --regenerate_from")
+            exit_code = 2
+        elif (args.regenerate_from and args.merge):
+            logging.error("Regenerate mode rebuilds the mapping files, --merge can not be used with --regenerate_from")
+            exit_code = 2
+        elif show_folders:
+            # Batch Map Show Folder(s)
+            exit_code = batch_map_show_folders(show_folders, args.primary_model, args.workers, args.process_pool, args.match,
+                                               args.used_models, args.merge, args.primary_group, args.target_group,
+                                               args.regenerate_from)
+        else:
+            logging.error("Batch mode requires a show folder (-s/--show_folder)")
+            exit_code = 2
+    else:
+        # Show Folder Window
+        show_folder_window(show_folder)
     logging.info("#" * 50)
     logging.info("#" * 5 + " Map Model/Submodels End")
     logging.info("#" * 50)
 
+    # Profile Report(s)
+    if cprofiler is not None:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+        logging.info(f"cProfile statistics written to {args.cprofile}")
+    if args.profile:
+        profile_report = json.dumps(profiler.report(), indent=2)
+        if (args.profile == '-'):
+            print(profile_report)
+        else:
+            with open(args.profile, 'w', encoding='utf-8') as f:
+                f.write(profile_report + "\n")
+            logging.info(f"Profile report written to {args.profile}")
+    return(exit_code)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file